@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import logging
+import tempfile
+import statistics
+from datetime import datetime, timezone
+import standin_site
+
+# Offline latency benchmark: runs each entry point against standin_site.py and
+# reports per-phase and end-to-end timings.
+#   python benchmark.py --iterations 10 --latency 0.08 --engines http,selenium
+
+MEMBER_CODE = "BENCH01"
+MEMBER_NAME = "Bench Member"
+CHROME_BINARY = "/usr/bin/google-chrome-stable"
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# Timing Helpers
+# =============================
+class Run:
+    """Phase timings of one entry-point run."""
+
+    def __init__(self):
+        self.phases = {}
+        self.started = time.perf_counter()
+
+    def phase(self, name, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.phases[name] = time.perf_counter() - t0
+
+    def finish(self):
+        self.phases["end_to_end"] = time.perf_counter() - self.started
+        return self.phases
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+# =============================
+# Scenarios
+# =============================
+def bench_http(entry, state):
+    import http_engine
+    import session_cache
+    import main as booking
+    import check_sessions
+    import check_reservation
+
+    run = Run()
+    session = run.phase("startup", http_engine.create_session)
+    run.phase("login", session_cache.login_http, session, MEMBER_CODE, MEMBER_NAME)
+    if entry == "main":
+        page_url, page = run.phase("tomorrow_tab", http_engine.fetch_day, session, "tomorrow")
+        run.phase("booking", booking.book_http, session, page_url, page)
+    elif entry == "check_sessions":
+        pages = run.phase("scan", http_engine.fetch_days, session)
+        run.phase("report", lambda: [check_sessions.format_day(d, p.snapshot) for d, (_, p) in pages.items()])
+    elif entry == "check_reservation":
+        pages = run.phase("scan", http_engine.fetch_days, session)
+        run.phase("report", check_reservation.report_reservations, {d: p.snapshot for d, (_, p) in pages.items()})
+    return run.finish()
+
+
+def bench_selenium(entry, state):
+    import main as booking
+    import check_sessions
+    import check_reservation
+
+    run = Run()
+    driver = run.phase("startup", booking.create_driver)
+    try:
+        run.phase("login", booking.login, driver, MEMBER_CODE, MEMBER_NAME)
+        if entry == "main":
+            run.phase("booking", booking.perform_booking, driver)
+        elif entry == "check_sessions":
+            run.phase("scan", check_sessions.check_sessions, driver)
+        elif entry == "check_reservation":
+            run.phase("scan", check_reservation.check_reservation, driver)
+        return run.finish()
+    finally:
+        driver.quit()
+
+
+def bench_release(engine, state, lead):
+    """Time from the release instant to a confirmed booking in BOOKING_MODE=release."""
+    import main as booking
+    import release_mode
+
+    release_at = math.ceil(time.time()) + lead
+    state.release_at = release_at
+    release_mode.RELEASE_TIME = datetime.fromtimestamp(release_at, tz=timezone.utc).strftime("%H:%M:%S")
+
+    run = Run()
+    if engine == "http":
+        run.phase("release_run", booking.run_release_http, time.time())
+    else:
+        driver = run.phase("startup", booking.create_driver)
+        try:
+            run.phase("login", booking.login, driver, MEMBER_CODE, MEMBER_NAME)
+            run.phase("release_run", booking.run_release_selenium, driver, time.time())
+        finally:
+            driver.quit()
+    phases = run.finish()
+    booked_at = state.booked_at.get((MEMBER_CODE, "tomorrow"))
+    phases["booked"] = 1.0 if booked_at else 0.0
+    if booked_at:
+        phases["release_to_booked"] = booked_at - release_at
+    return phases
+
+# =============================
+# Report
+# =============================
+def summarize(results):
+    rows = []
+    for (engine, entry), runs in results.items():
+        for name in dict.fromkeys(k for r in runs for k in r):
+            values = [r[name] for r in runs if name in r]
+            if not values:
+                continue
+            rows.append({
+                "engine": engine, "entry": entry, "phase": name, "n": len(values),
+                "median_ms": statistics.median(values) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "min_ms": min(values) * 1000,
+                "max_ms": max(values) * 1000,
+            })
+    return rows
+
+
+def print_table(rows):
+    print(f"{'engine':9} {'entry':18} {'phase':18} {'n':>3} {'median':>10} {'p95':>10} {'min':>10} {'max':>10}")
+    for r in rows:
+        if r["phase"] == "booked":
+            print(f"{r['engine']:9} {r['entry']:18} {r['phase']:18} {r['n']:>3} {'success rate':>10} {r['median_ms'] / 10:>9.0f}%")
+            continue
+        print(f"{r['engine']:9} {r['entry']:18} {r['phase']:18} {r['n']:>3} "
+              f"{r['median_ms']:>8.1f}ms {r['p95_ms']:>8.1f}ms {r['min_ms']:>8.1f}ms {r['max_ms']:>8.1f}ms")
+
+# =============================
+# MAIN
+# =============================
+def main():
+    parser = argparse.ArgumentParser(description="Per-phase latency benchmark against the local stand-in site")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--engines", default="http,selenium" if os.path.exists(CHROME_BINARY) else "http")
+    parser.add_argument("--entries", default="main,check_sessions,check_reservation,release")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--contention", type=float, default=2.0, help="seats/s taken by others after release")
+    parser.add_argument("--release-lead", type=float, default=6.0, help="seconds from start to release in the release scenario")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the session cache between iterations")
+    parser.add_argument("--json", help="also write the summary rows to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    state = standin_site.SiteState(latency=args.latency, jitter=args.jitter, contention=args.contention, seed=7)
+    server, url = standin_site.start(state)
+
+    # The bot modules read their configuration at import time
+    workdir = tempfile.mkdtemp(prefix="bot-bench-")
+    os.chdir(workdir)
+    os.environ.update({
+        "SITE_URL": url, "GYM_CODE": MEMBER_CODE, "GYM_NAME": MEMBER_NAME, "DISCORD_WEBHOOK": "",
+        "BOT_CACHE_DIR": os.path.join(workdir, ".cache"), "RELEASE_EARLY": "0.5", "RELEASE_WINDOW": "10",
+    })
+    if not args.warm_cache:
+        os.environ["SESSION_CACHE_TTL"] = "0"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    try:
+        for engine in args.engines.split(","):
+            for entry in args.entries.split(","):
+                runs = []
+                for _ in range(args.iterations):
+                    state.reset()
+                    if entry == "check_reservation":
+                        state.reserve(MEMBER_CODE, "tomorrow", 1)  # Measure the check, not the inline booking
+                    if entry == "release":
+                        runs.append(bench_release(engine, state, args.release_lead))
+                    elif engine == "http":
+                        runs.append(bench_http(entry, state))
+                    else:
+                        runs.append(bench_selenium(entry, state))
+                results[(engine, entry)] = runs
+                logging.getLogger().setLevel(logging.WARNING)  # Entry modules reconfigure logging on import
+    finally:
+        server.shutdown()
+        os.chdir("/")
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = summarize(results)
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=1)
+
+if __name__ == "__main__":
+    main()
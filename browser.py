@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+import metrics
+import network_log
+import session_cache
+
+# Constants
+BROWSER_PROFILE = os.getenv("BROWSER_PROFILE", "lean").lower()  # "lean" blocks non-essential loads, "full" is the old profile
+CHROME_BINARY = os.getenv("CHROME_BINARY", "/usr/bin/google-chrome-stable")  # GitHub Actions location
+PAGE_LOAD_TIMEOUT = float(os.getenv("PAGE_LOAD_TIMEOUT", "15"))  # A hung driver.get() raises instead of blocking for 300 s
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "")  # Explicit binary; skips every lookup
+CHROMEDRIVER_VERSION = os.getenv("CHROMEDRIVER_VERSION", "")  # Pinned version; empty pins whatever matches Chrome on first install
+DRIVER_DIR = os.path.join(session_cache.CACHE_DIR, "chromedriver")  # Pinned binaries, kept with the bot state
+DRIVER_PIN = os.path.join(DRIVER_DIR, "pin.json")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Resource types the bot never reads. Stylesheets stay: #membership-warning.is_displayed() depends on them
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+]
+# Third-party hosts resolved to nothing, in every tab (CDP blocking is per tab)
+BLOCKED_HOSTS = [
+    "*.google-analytics.com", "*.googletagmanager.com", "*.doubleclick.net", "*.googlesyndication.com",
+    "*.facebook.net", "*.hotjar.com", "*.clarity.ms", "fonts.googleapis.com", "fonts.gstatic.com",
+]
+BLOCKED_HOSTS += [h.strip() for h in os.getenv("BLOCKED_HOSTS", "").split(",") if h.strip()]
+
+LEAN_ARGS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication",
+    "--no-first-run",
+    "--mute-audio",
+    "--host-resolver-rules=" + ", ".join(f"MAP {host} ~NOTFOUND" for host in BLOCKED_HOSTS),
+]
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# Create Driver
+# =============================
+def chrome_options(profile=BROWSER_PROFILE):
+    chrome_opts = Options()
+    chrome_opts.add_argument("--headless=new")
+    chrome_opts.add_argument("--no-sandbox")
+    chrome_opts.add_argument("--disable-dev-shm-usage")
+    chrome_opts.add_argument("--window-size=1366,768")
+    chrome_opts.add_argument("--disable-gpu")
+    chrome_opts.add_argument("--disable-extensions")
+    chrome_opts.add_argument(f"--user-agent={USER_AGENT}")
+    chrome_opts.binary_location = CHROME_BINARY
+    if profile == "lean":
+        for arg in LEAN_ARGS:
+            chrome_opts.add_argument(arg)
+        # driver.get() returns at DOMContentLoaded; every caller waits for its own elements anyway
+        chrome_opts.page_load_strategy = "eager"
+    if network_log.NETWORK_LOG:
+        # Chrome's DevTools network events, read back with driver.get_log("performance")
+        chrome_opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_opts.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    return chrome_opts
+
+
+# =============================
+# Pinned Driver
+# =============================
+def _read_pin():
+    try:
+        with open(DRIVER_PIN, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def driver_version(path):
+    """Version a chromedriver binary reports, e.g. "120.0.6099.109"."""
+    output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout.split()
+    return output[1] if len(output) > 1 else "unknown"
+
+
+def install_driver():
+    """Resolves a chromedriver once (network) and pins a copy under DRIVER_DIR for later runs."""
+    with metrics.span("driver_install"):
+        source = ChromeDriverManager(driver_version=CHROMEDRIVER_VERSION or None).install()
+    version = driver_version(source)
+    target = os.path.join(DRIVER_DIR, version, os.path.basename(source))
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(source, target)
+        tmp = DRIVER_PIN + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "path": target, "pinned_at": time.time()}, f)
+        os.replace(tmp, DRIVER_PIN)
+    except OSError as e:
+        logger.warning(f"Could not pin chromedriver {version}: {e}")
+        return source
+    logger.info(f"Pinned chromedriver {version}.")
+    return target
+
+
+def driver_path():
+    """Chromedriver binary to start; a pinned or explicit one costs no lookup at all."""
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+    pin = _read_pin()
+    if pin and os.access(pin.get("path", ""), os.X_OK) and CHROMEDRIVER_VERSION in ("", pin.get("version")):
+        return pin["path"]
+    return install_driver()
+
+# =============================
+# Startup Pipeline
+# =============================
+def _time_first_page(driver):
+    # Records seconds from the start of the run to the end of the first navigation, then steps aside
+    get = driver.get
+
+    def first_get(url):
+        try:
+            return get(url)
+        finally:
+            driver.get = get
+            run = metrics.current_run()
+            if run is not None:
+                metrics.record("time_to_first_page", time.time() - run["started"])
+
+    driver.get = first_get
+
+
+def start(code=None, profile=BROWSER_PROFILE):
+    """create_driver() with the member's saved session read alongside Chrome's launch."""
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="startup")
+    loading = pool.submit(session_cache.prefetch, code) if code else None
+    try:
+        return create_driver(profile)
+    finally:
+        if loading is not None:
+            loading.result()  # login() must see the prefetched entry, not race it
+        pool.shutdown(wait=False)
+
+
+@metrics.timed("create_driver")
+def create_driver(profile=BROWSER_PROFILE):
+    logger.info("Starting Chrome driver...")
+    started = time.perf_counter()
+    path = driver_path()
+    try:
+        driver = webdriver.Chrome(service=Service(path), options=chrome_options(profile))
+    except SessionNotCreatedException as e:
+        if CHROMEDRIVER_PATH or CHROMEDRIVER_VERSION:
+            raise
+        # Chrome moved past the pinned driver: pin a matching one and start again
+        logger.warning(f"Pinned chromedriver rejected by Chrome, re-pinning: {e.msg}")
+        driver = webdriver.Chrome(service=Service(install_driver()), options=chrome_options(profile))
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)  # waits.retry() treats the TimeoutException as retryable
+    if profile == "lean":
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+        except Exception as e:
+            logger.warning(f"Could not set up resource blocking: {e}")
+    metrics.instrument(driver)
+    _time_first_page(driver)
+    logger.info(f"Chrome driver started successfully ({profile} profile, {time.perf_counter() - started:.2f}s).")
+    return driver
+
+# =============================
+# Footprint
+# =============================
+def page_load_time(driver):
+    """Seconds from navigation start to DOMContentLoaded and to load for the current page."""
+    timing = driver.execute_script(
+        "var n = performance.getEntriesByType('navigation')[0];"
+        "return n ? [n.domContentLoadedEventEnd, n.loadEventEnd] : null;"
+    )
+    if not timing:
+        return None, None
+    return timing[0] / 1000, (timing[1] / 1000 if timing[1] else None)
+
+
+def _children(pid):
+    by_parent = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        by_parent.setdefault(ppid, []).append(int(entry))
+    found, queue = [], [pid]
+    while queue:
+        current = queue.pop()
+        found.append(current)
+        queue.extend(by_parent.get(current, []))
+    return found
+
+
+def memory(driver):
+    """(current RSS, peak RSS) in MB summed over chromedriver and every Chrome process; Linux only."""
+    try:
+        pids = _children(driver.service.process.pid)
+    except (AttributeError, OSError):
+        return None, None
+    rss = peak = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1])
+                    elif line.startswith("VmHWM:"):
+                        peak += int(line.split()[1])
+        except OSError:
+            continue
+    return rss / 1024, peak / 1024
+
+
+def compare(url, loads=5, profiles=("full", "lean")):
+    """Loads `url` repeatedly under each profile and prints page-load time and peak RSS."""
+    print(f"{'profile':8} {'startup':>9} {'dcl p50':>9} {'load p50':>9} {'get() p50':>9} {'peak RSS':>10}")
+    for profile in profiles:
+        started = time.perf_counter()
+        driver = create_driver(profile)
+        startup = time.perf_counter() - started
+        try:
+            dcl, load, get = [], [], []
+            for _ in range(loads):
+                t0 = time.perf_counter()
+                driver.get(url)
+                get.append(time.perf_counter() - t0)
+                ready, loaded = page_load_time(driver)
+                dcl.append(ready or 0)
+                load.append(loaded or 0)
+            _, peak = memory(driver)
+        finally:
+            driver.quit()
+        peak_text = f"{peak:.0f} MB" if peak is not None else "n/a"
+        print(f"{profile:8} {startup:>8.2f}s {statistics.median(dcl) * 1000:>7.0f}ms "
+              f"{statistics.median(load) * 1000:>7.0f}ms {statistics.median(get) * 1000:>7.0f}ms {peak_text:>10}")
+
+
+if __name__ == "__main__":
+    # python browser.py [url] [loads] -> page-load time and peak RSS, full vs lean profile
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    compare(sys.argv[1] if len(sys.argv) > 1 else os.getenv("SITE_URL", "https://performancelab.my.id/"),
+            int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -1,19 +1,25 @@
 import os
 import logging
 import traceback
-import requests
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import http_engine
+import browser
+import slots
+import main as booking
+import session_cache
+import flight_recorder
+import metrics
+import ledger
+import lease
+import waits
+from notify import send_log
 
 # Constants
-WEB_URL = "https://performancelab.my.id/"
-DASHBOARD_URL = "https://performancelab.my.id/dashboard.php"
-TIMEOUT = 10  # Seconds for WebDriverWait
+WEB_URL = os.getenv("SITE_URL", "https://performancelab.my.id/")  # Point at standin_site.py for offline runs
+DASHBOARD_URL = WEB_URL.rstrip("/") + "/dashboard.php"
+ENGINE = os.getenv("ENGINE", "http").lower()  # "http" tries the browserless engine first, "selenium" skips it
+AUTOBOOK_INLINE = os.getenv("AUTOBOOK_INLINE", "1") == "1"  # Book in this run instead of dispatching runbot
 
 # Environment variables
 GYM_CODE = os.getenv("GYM_CODE", "")
@@ -31,75 +37,57 @@ def notify(msg):
     logger.info(f"[NOTIFY] {msg}")
     if not DISCORD_WEBHOOK:
         return
-    try:
-        requests.post(DISCORD_WEBHOOK, json={"content": msg}, timeout=5)
-    except Exception as e:
-        logger.error(f"Failed to send Discord notification: {e}")
+    # Queued and sent in the background; never blocks the booking path
+    send_log(msg)
 
 # =============================
 # Screenshot + HTML Dump
 # =============================
 def debug_capture(driver, name):
-    os.makedirs("debug", exist_ok=True)
-    try:
-        driver.save_screenshot(f"debug/{name}.png")
-        with open(f"debug/{name}.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-        logger.info(f"Debug capture saved: {name}")
-    except Exception as e:
-        logger.error(f"Failed to capture debug: {e}")
+    # Kept in memory; written to debug/ only when the run fails (see flight_recorder)
+    flight_recorder.capture(driver, name)
 
 # =============================
 # Create Driver
 # =============================
 def create_driver():
-    logger.info("Starting Chrome driver...")
-    chrome_opts = Options()
-    chrome_opts.add_argument("--headless=new")
-    chrome_opts.add_argument("--no-sandbox")
-    chrome_opts.add_argument("--disable-dev-shm-usage")
-    chrome_opts.add_argument("--window-size=1366,768")
-    chrome_opts.add_argument("--disable-gpu")
-    chrome_opts.add_argument("--disable-extensions")
-    chrome_opts.add_argument("--disable-images")  # Speed up loading
-    chrome_opts.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    
-    # For GitHub Actions compatibility
-    chrome_opts.binary_location = "/usr/bin/google-chrome-stable"
-    
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=chrome_opts
-    )
-    logger.info("Chrome driver started successfully.")
-    return driver
+    # Shared Chrome profile; BROWSER_PROFILE=full restores the old one (see browser.py)
+    return browser.start(GYM_CODE)
 
 # =============================
 # Login Function
 # =============================
+@metrics.timed("login")
 def login(driver):
-    logger.info("Navigating to login page...")
-    driver.get(WEB_URL)
-    
-    try:
-        WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.NAME, "kode")))
+    # Cached cookies skip the form entirely when the dashboard still accepts them
+    restored = session_cache.restore_driver(driver, GYM_CODE)
+
+    def submit_form():
+        # Safe to repeat: every attempt starts from a fresh login page
+        logger.info("Navigating to login page...")
+        driver.get(WEB_URL)
+        waits.until(driver, EC.presence_of_element_located((By.NAME, "kode")), "login_page")
         debug_capture(driver, "01_login_page_loaded")
-        
+
         logger.info("Filling login form...")
         driver.find_element(By.NAME, "kode").send_keys(GYM_CODE)
         driver.find_element(By.NAME, "nama").send_keys(GYM_NAME)
         debug_capture(driver, "02_login_form_filled")
-        
+
         logger.info("Submitting login...")
-        submit_btn = WebDriverWait(driver, TIMEOUT).until(EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']")))
+        submit_btn = waits.until(driver, EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']")), "login_submit")
         submit_btn.click()
-        
-        WebDriverWait(driver, TIMEOUT).until(lambda d: "dashboard.php" in d.current_url)
+
+        waits.until(driver, lambda d: "dashboard.php" in d.current_url, "login_redirect")
         debug_capture(driver, "03_after_login_attempt")
+
+    try:
+        if not restored:
+            waits.retry(submit_form, "login")
         
         # Check for membership status on dashboard
         logger.info("Verifying dashboard and membership status...")
-        membership_elem = WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.CLASS_NAME, "membership-status")))
+        membership_elem = waits.until(driver, EC.presence_of_element_located((By.CLASS_NAME, "membership-status")), "membership")
         membership_text = membership_elem.text
         logger.info(f"Membership status: {membership_text}")
         notify(">> Scanning for reservation")
@@ -109,82 +97,190 @@ def login(driver):
         if warning_elem.is_displayed():
             logger.warning("Membership has expired!")
             notify(">> Membership has expired!")
+            session_cache.invalidate(GYM_CODE)
             return False
         
         logger.info("Login and dashboard verification successful.")
+        session_cache.save_driver(driver, GYM_CODE, membership_text)
         return True
     except Exception as e:
         logger.error(f"Login failed: {e}")
         debug_capture(driver, "03_login_failed")
+        session_cache.invalidate(GYM_CODE)
         notify(">> Unable to login")
         return False
 
 # =============================
 # Check Reservation Function
 # =============================
+@metrics.timed("check_reservation")
 def check_reservation(driver):
-    logger.info("Checking reservations for today and tomorrow...")
+    logger.info("Checking reservations on every day tab...")
     
     if DASHBOARD_URL not in driver.current_url:
         driver.get(DASHBOARD_URL)
-        WebDriverWait(driver, TIMEOUT).until(EC.url_contains("dashboard.php"))
+        waits.until(driver, EC.url_contains("dashboard.php"), "dashboard")
     
     debug_capture(driver, "04_dashboard_loaded")
     
-    dates = ["today", "tomorrow"]
-    tomorrow_reserved = False
-    for date in dates:
-        logger.info(f"Checking {date}...")
-        try:
-            date_btn = WebDriverWait(driver, TIMEOUT).until(EC.element_to_be_clickable((By.CSS_SELECTOR, f".date-btn[data-day='{date}']")))
-            date_btn.click()
-            WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".session-slot")))  # Wait for slots to load
-            debug_capture(driver, f"05_{date}_tab_clicked")
-        except Exception as e:
-            logger.error(f"Could not click {date} tab: {e}")
-            continue
-        
+    # Every day loads in its own browser tab at the same time
+    waits.until(driver, EC.presence_of_element_located((By.CSS_SELECTOR, ".date-btn[data-day]")), "dashboard_tabs")
+    snapshots = slots.scan_days(driver, http_engine.DAY_URL,
+                                capture=lambda date: debug_capture(driver, f"05_{date}_tab_loaded"))
+    for date, snapshot in snapshots.items():
+        if snapshot is None:
+            logger.error(f"Could not load {date} tab")
+            flight_recorder.flush(f"{date} tab failed")
+
+    scanned = {date: snapshot for date, snapshot in snapshots.items() if snapshot is not None}
+    ledger.sync(GYM_CODE, scanned)
+    reserved_days = report_reservations(scanned)
+    trigger_autobook("tomorrow" in reserved_days, lambda: booking.perform_booking(driver))
+
+def report_reservations(snapshots):
+    """One notification for every scanned day. Returns the days holding a reservation."""
+    lines = []
+    reserved_days = set()
+    for date, snapshot in snapshots.items():
         # Find reserved slots
-        reserved_slots = driver.find_elements(By.CSS_SELECTOR, ".session-slot.reserved-by-user")
+        reserved_slots = [slot for slot in snapshot if slot.reserved]
         if not reserved_slots:
             logger.info(f"No reservations found for {date}.")
-            notify(f">> No reservation for {date}.")
-            if date == "tomorrow":
-                tomorrow_reserved = False
+            lines.append(f">> No reservation for {date}.")
             continue
-        
+
+        reserved_days.add(date)
         for slot in reserved_slots:
-            session_id = slot.get_attribute("data-session-id")
-            booking_code_elem = slot.find_element(By.CLASS_NAME, "booking-code")
-            booking_code = booking_code_elem.text.replace("Kode: ", "").strip()
-            logger.info(f"Reservation found for {date}: Session {session_id}, Kode: {booking_code}")
-            notify(f">> Reservation found for {date}: session {session_id} ({booking_code})")
-            if date == "tomorrow":
-                tomorrow_reserved = True
-    
-    # If no reservation for tomorrow, trigger autobook
-    if not tomorrow_reserved:
-        logger.info("No reservation for tomorrow. Triggering autobook.")
-        notify(">> No reservation for tomorrow. Attempting to book...")
-        with open("trigger_autobook.flag", "w") as f:
-            f.write("trigger")
-    else:
+            logger.info(f"Reservation found for {date}: Session {slot.session_id}, Kode: {slot.booking_code}")
+            lines.append(f">> Reservation found for {date}: session {slot.session_id} ({slot.booking_code})")
+    notify("\n".join(lines))
+    return reserved_days
+
+# =============================
+# Autobook Trigger
+# =============================
+def trigger_autobook(tomorrow_reserved, book=None):
+    if tomorrow_reserved:
         logger.info("Reservation exists for tomorrow. No autobook needed.")
+        return
+
+    notify(">> No reservation for tomorrow. Attempting to book...")
+    # Book right here in the logged-in session; the dispatch chain is only a fallback
+    if AUTOBOOK_INLINE and book is not None:
+        with lease.hold(GYM_CODE, "tomorrow", "check_reservation") as owned:
+            if not owned:
+                # The run holding the lease books (or dispatches) on its own
+                notify(">> Another run is still booking tomorrow, leaving it to that run")
+                return
+            if booking.already_booked(GYM_CODE):
+                return
+            logger.info("No reservation for tomorrow. Booking in this session.")
+            try:
+                if book():
+                    notify(">> Reservation complete")
+                    return
+            except Exception as e:
+                logger.error(f"Inline booking failed: {e}")
+        notify(">> Inline booking failed, dispatching autobook")
+
+    # If no reservation for tomorrow, trigger autobook
+    logger.info("No reservation for tomorrow. Triggering autobook.")
+    with open("trigger_autobook.flag", "w") as f:
+        f.write("trigger")
+
+# =============================
+# Browserless Reservation Check
+# =============================
+def run_http():
+    """Reservation check over plain HTTP. Returns True when done, or None to fall back to Selenium."""
+    try:
+        session = http_engine.create_session()
+        logger.info("Logging in over HTTP...")
+        with metrics.span("login"):
+            membership_text = session_cache.login_http(session, GYM_CODE, GYM_NAME)
+        logger.info(f"Membership status: {membership_text}")
+
+        logger.info("Checking every day tab...")
+        with metrics.span("day_tab"):
+            pages = http_engine.fetch_days(session)
+    except http_engine.HttpEngineError as e:
+        logger.warning(f"HTTP engine unavailable, falling back to Selenium: {e}")
+        return None
+
+    notify(">> Scanning for reservation")
+    scanned = {date: page.snapshot for date, (_, page) in pages.items()}
+    ledger.sync(GYM_CODE, scanned)
+    reserved_days = report_reservations(scanned)
+
+    trigger_autobook("tomorrow" in reserved_days, lambda: booking.book_http(session, *http_engine.fetch_day(session, "tomorrow")))
+    return True
+
+# =============================
+# Reservation Ledger
+# =============================
+def verify_http():
+    """Cheap check of a ledger entry: cached-cookie login plus the tomorrow view, no browser."""
+    try:
+        session = http_engine.create_session()
+        session_cache.login_http(session, GYM_CODE, GYM_NAME)
+        _, page = http_engine.fetch_day(session, "tomorrow")
+    except http_engine.HttpEngineError as e:
+        logger.warning(f"Cheap verification unavailable: {e}")
+        return False
+    ledger.sync(GYM_CODE, {"tomorrow": page.snapshot}, source="verify")
+    return any(slot.reserved for slot in page.snapshot)
+
+def check_ledger():
+    """Answers from the reservation ledger when it can. Returns True when no scan is needed."""
+    entry = ledger.lookup(GYM_CODE, "tomorrow")
+    if entry is None:
+        logger.info("No ledger entry for tomorrow, scanning the site.")
+        return False
+    if not ledger.fresh(entry):
+        # Stale: one cheap look instead of the full scan, when the HTTP engine fits the site
+        if ENGINE != "http" or not verify_http():
+            logger.info("Ledger entry not confirmed, scanning the site.")
+            return False
+        entry = ledger.lookup(GYM_CODE, "tomorrow")
+
+    lines = []
+    for date in ("today", "tomorrow"):
+        on_record = ledger.lookup(GYM_CODE, date)
+        if on_record is not None:
+            lines.append(f">> Reservation found for {date}: session {on_record['session_id']} ({on_record['booking_code']})")
+    notify("\n".join(lines))
+    logger.info(f"Reservation for tomorrow on record ({entry['source']}); skipping the scan.")
+    return True
 
 # =============================
 # MAIN
 # =============================
 def main():
     notify("__**>> Checking for reservation <<**__.")
-    
+
+    metrics.start_run("check_reservation", engine=ENGINE)
+
+    if check_ledger():
+        metrics.finish("ledger")
+        return
+
+    if ENGINE == "http" and run_http():
+        metrics.finish("ok")
+        return
+
     driver = None
+    failed = True
+    outcome = "error"
     try:
         driver = create_driver()
         if not login(driver):
             logger.error("Login failed, exiting.")
+            outcome = "login_failed"
             return
         
         check_reservation(driver)
+        failed = False
+        outcome = "ok"
     
     except Exception as e:
         logger.error(f"Fatal error: {e}")
@@ -198,6 +294,8 @@ def main():
                 logger.info("Driver closed.")
             except Exception as e:
                 logger.error(f"Error closing driver: {e}")
+        flight_recorder.close(failed)
+        metrics.finish(outcome)
 
 if __name__ == "__main__":
     main()
@@ -1,19 +1,22 @@
 import os
 import logging
 import traceback
-import requests
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import http_engine
+import browser
+import slots
+import session_cache
+import flight_recorder
+import metrics
+import waits
+import slot_history
+from notify import send_log
 
 # Constants
-WEB_URL = "https://performancelab.my.id/"
-DASHBOARD_URL = "https://performancelab.my.id/dashboard.php"
-TIMEOUT = 10  # Seconds for WebDriverWait
+WEB_URL = os.getenv("SITE_URL", "https://performancelab.my.id/")  # Point at standin_site.py for offline runs
+DASHBOARD_URL = WEB_URL.rstrip("/") + "/dashboard.php"
+ENGINE = os.getenv("ENGINE", "http").lower()  # "http" tries the browserless engine first, "selenium" skips it
 
 # Environment variables
 GYM_CODE = os.getenv("GYM_CODE", "")
@@ -31,75 +34,57 @@ def notify(msg):
     logger.info(f"[NOTIFY] {msg}")
     if not DISCORD_WEBHOOK:
         return
-    try:
-        requests.post(DISCORD_WEBHOOK, json={"content": msg}, timeout=5)
-    except Exception as e:
-        logger.error(f"Failed to send Discord notification: {e}")
+    # Queued and sent in the background; never blocks the booking path
+    send_log(msg)
 
 # =============================
 # Screenshot + HTML Dump
 # =============================
 def debug_capture(driver, name):
-    os.makedirs("debug", exist_ok=True)
-    try:
-        driver.save_screenshot(f"debug/{name}.png")
-        with open(f"debug/{name}.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-        logger.info(f"Debug capture saved: {name}")
-    except Exception as e:
-        logger.error(f"Failed to capture debug: {e}")
+    # Kept in memory; written to debug/ only when the run fails (see flight_recorder)
+    flight_recorder.capture(driver, name)
 
 # =============================
 # Create Driver
 # =============================
 def create_driver():
-    logger.info("Starting Chrome driver...")
-    chrome_opts = Options()
-    chrome_opts.add_argument("--headless=new")
-    chrome_opts.add_argument("--no-sandbox")
-    chrome_opts.add_argument("--disable-dev-shm-usage")
-    chrome_opts.add_argument("--window-size=1366,768")
-    chrome_opts.add_argument("--disable-gpu")
-    chrome_opts.add_argument("--disable-extensions")
-    chrome_opts.add_argument("--disable-images")  # Speed up loading
-    chrome_opts.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    
-    # For GitHub Actions compatibility
-    chrome_opts.binary_location = "/usr/bin/google-chrome-stable"
-    
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=chrome_opts
-    )
-    logger.info("Chrome driver started successfully.")
-    return driver
+    # Shared Chrome profile; BROWSER_PROFILE=full restores the old one (see browser.py)
+    return browser.start(GYM_CODE)
 
 # =============================
 # Login Function
 # =============================
+@metrics.timed("login")
 def login(driver):
-    logger.info("Navigating to login page...")
-    driver.get(WEB_URL)
-    
-    try:
-        WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.NAME, "kode")))
+    # Cached cookies skip the form entirely when the dashboard still accepts them
+    restored = session_cache.restore_driver(driver, GYM_CODE)
+
+    def submit_form():
+        # Safe to repeat: every attempt starts from a fresh login page
+        logger.info("Navigating to login page...")
+        driver.get(WEB_URL)
+        waits.until(driver, EC.presence_of_element_located((By.NAME, "kode")), "login_page")
         debug_capture(driver, "01_login_page_loaded")
-        
+
         logger.info("Filling login form...")
         driver.find_element(By.NAME, "kode").send_keys(GYM_CODE)
         driver.find_element(By.NAME, "nama").send_keys(GYM_NAME)
         debug_capture(driver, "02_login_form_filled")
-        
+
         logger.info("Submitting login...")
-        submit_btn = WebDriverWait(driver, TIMEOUT).until(EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']")))
+        submit_btn = waits.until(driver, EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']")), "login_submit")
         submit_btn.click()
-        
-        WebDriverWait(driver, TIMEOUT).until(lambda d: "dashboard.php" in d.current_url)
+
+        waits.until(driver, lambda d: "dashboard.php" in d.current_url, "login_redirect")
         debug_capture(driver, "03_after_login_attempt")
+
+    try:
+        if not restored:
+            waits.retry(submit_form, "login")
         
         # Check for membership status on dashboard
         logger.info("Verifying dashboard and membership status...")
-        membership_elem = WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.CLASS_NAME, "membership-status")))
+        membership_elem = waits.until(driver, EC.presence_of_element_located((By.CLASS_NAME, "membership-status")), "membership")
         membership_text = membership_elem.text
         logger.info(f"Membership status: {membership_text}")
         notify(f"*{membership_text}*")
@@ -109,78 +94,116 @@ def login(driver):
         if warning_elem.is_displayed():
             logger.warning("Membership has expired!")
             notify("⚠ Masa aktif membership telah berakhir.")
+            session_cache.invalidate(GYM_CODE)
             return False
         
         logger.info("Login and dashboard verification successful.")
+        session_cache.save_driver(driver, GYM_CODE, membership_text)
         notify(">> Login Success")
         return True
     except Exception as e:
         logger.error(f"Login failed: {e}")
         debug_capture(driver, "03_login_failed")
+        session_cache.invalidate(GYM_CODE)
         notify(">> Login Failed, Please Check")
         return False
 
 # =============================
 # Check Sessions Function
 # =============================
+@metrics.timed("check_sessions")
 def check_sessions(driver):
-    logger.info("Checking sessions for today and tomorrow...")
+    logger.info("Checking sessions for every day tab...")
 
     if DASHBOARD_URL not in driver.current_url:
         driver.get(DASHBOARD_URL)
-        WebDriverWait(driver, TIMEOUT).until(EC.url_contains("dashboard.php"))
+        waits.until(driver, EC.url_contains("dashboard.php"), "dashboard")
 
     debug_capture(driver, "04_dashboard_loaded")
 
-    dates = ["today", "tomorrow"]
-    for date in dates:
-        logger.info(f"Checking {date}...")
-        try:
-            date_btn = WebDriverWait(driver, TIMEOUT).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, f".date-btn[data-day='{date}']"))
-            )
-            date_btn.click()
-            WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".session-slot")))
-            debug_capture(driver, f"05_{date}_tab_clicked")
-        except Exception as e:
-            logger.error(f"Could not click {date} tab: {e}")
-            notify(f">> Could not click {date} tab")
+    # Every day loads in its own browser tab at the same time
+    waits.until(driver, EC.presence_of_element_located((By.CSS_SELECTOR, ".date-btn[data-day]")), "dashboard_tabs")
+    snapshots = slots.scan_days(driver, http_engine.DAY_URL,
+                                capture=lambda date: debug_capture(driver, f"05_{date}_tab_loaded"))
+
+    outputs = []
+    for date, snapshot in snapshots.items():
+        if snapshot is None:
+            logger.error(f"Could not load {date} tab")
+            flight_recorder.flush(f"{date} tab failed")
+            outputs.append(f">> Could not load {date} tab")
             continue
+        slot_history.record(date, snapshot)
+        outputs.append(format_day(date, snapshot))
+    notify("\n".join(outputs))
+
+def format_day(date, snapshot):
+    by_id = {slot.session_id: slot for slot in snapshot}
+    day_output = f"**{date.capitalize()}**\n"
+    for session_id in range(1, 7):
+        slot = by_id.get(session_id)
+        if slot is None:
+            logger.warning(f"Could not check {date} session {session_id}: slot not found")
+            day_output += f"Session {session_id} : Unable to check\n"
+            continue
+        status = "Full" if slot.full else "Available"
+        day_output += f"Session {session_id} : {status} ({slot.quota_text})\n"
+    return day_output
 
-        day_output = f"**{date.capitalize()}**\n"
-        for session_id in range(1, 7):
-            try:
-                slot = driver.find_element(By.CSS_SELECTOR, f".session-slot[data-session-id='{session_id}']")
-                quota_elem = slot.find_element(By.CLASS_NAME, "session-quota")
-                quota_text = quota_elem.text  # e.g., "Kuota: 21/30"
-
-                if "30/30" in quota_text:
-                    status = "Full"
-                else:
-                    is_full = "full" in slot.get_attribute("class") or "Penuh" in slot.find_element(By.TAG_NAME, "button").text
-                    status = "Available" if not is_full else "Full"
-
-                day_output += f"Session {session_id} : {status} ({quota_text})\n"
+# =============================
+# Browserless Session Check
+# =============================
+def run_http():
+    """Session check over plain HTTP. Returns True when done, or None to fall back to Selenium."""
+    try:
+        session = http_engine.create_session()
+        logger.info("Logging in over HTTP...")
+        with metrics.span("login"):
+            membership_text = session_cache.login_http(session, GYM_CODE, GYM_NAME)
+        logger.info(f"Membership status: {membership_text}")
 
-            except Exception as e:
-                logger.warning(f"Could not check {date} session {session_id}: {e}")
-                day_output += f"Session {session_id} : Unable to check\n"
+        # Collect every day first so a fallback never repeats half the report
+        logger.info("Checking every day tab...")
+        with metrics.span("day_tab"):
+            pages = http_engine.fetch_days(session)
+    except http_engine.HttpEngineError as e:
+        logger.warning(f"HTTP engine unavailable, falling back to Selenium: {e}")
+        return None
+
+    notify(f"*{membership_text}*")
+    notify(">> Login Success")
+    for date, (_, page) in pages.items():
+        slot_history.record(date, page.snapshot)
+    notify("\n".join(format_day(date, page.snapshot) for date, (_, page) in pages.items()))
+    return True
 
-        notify(day_output)
+# =============================
 # MAIN
 # =============================
 def main():
     notify("__**>> Checking Sessions <<**__")
-    
+
+    metrics.start_run("check_sessions", engine=ENGINE)
+
+    if ENGINE == "http" and run_http():
+        notify(">> Session check complete")
+        metrics.finish("ok")
+        return
+
     driver = None
+    failed = True
+    outcome = "error"
     try:
         driver = create_driver()
         if not login(driver):
             logger.error("Login failed, exiting.")
+            outcome = "login_failed"
             return
         
         check_sessions(driver)
         notify(">> Session check complete")
+        failed = False
+        outcome = "ok"
     
     except Exception as e:
         logger.error(f"Fatal error: {e}")
@@ -194,6 +217,8 @@ def main():
                 logger.info("Driver closed.")
             except Exception as e:
                 logger.error(f"Error closing driver: {e}")
+        flight_recorder.close(failed)
+        metrics.finish(outcome)
 
 if __name__ == "__main__":
     main()
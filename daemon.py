@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import logging
+import threading
+import traceback
+import socketserver
+import main as booking
+import check_sessions
+import check_reservation
+import session_cache
+import flight_recorder
+import metrics
+import lease
+
+# Constants
+SOCKET_PATH = os.getenv("BOT_DAEMON_SOCKET", os.path.join(session_cache.CACHE_DIR, "bot.sock"))
+DAEMON_BROWSERS = int(os.getenv("DAEMON_BROWSERS", "1"))  # Warm Chrome instances
+DAEMON_MAX_AGE = int(os.getenv("DAEMON_MAX_AGE", "3600"))  # Seconds before a browser is recycled
+DAEMON_MAX_USES = int(os.getenv("DAEMON_MAX_USES", "50"))  # Commands before a browser is recycled
+DAEMON_HEALTH_INTERVAL = int(os.getenv("DAEMON_HEALTH_INTERVAL", "120"))  # Seconds between idle health checks
+CLIENT_TIMEOUT = 600
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# Browser Pool
+# =============================
+class WarmBrowser:
+    def __init__(self):
+        self.driver = booking.create_driver()
+        self.created = time.time()
+        self.uses = 0
+        self.logged_in = booking.login(self.driver)
+
+    def expired(self):
+        return time.time() - self.created > DAEMON_MAX_AGE or self.uses >= DAEMON_MAX_USES
+
+    def healthy(self):
+        """Reloads the dashboard; logs in again if the site dropped the session."""
+        try:
+            self.driver.get(booking.DASHBOARD_URL)
+            if "dashboard.php" not in self.driver.current_url:
+                logger.info("Session dropped, logging in again.")
+                self.logged_in = booking.login(self.driver)
+            return self.logged_in
+        except Exception as e:
+            logger.warning(f"Browser health check failed: {e}")
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing driver: {e}")
+
+
+class BrowserPool:
+    def __init__(self, size):
+        self.size = size
+        self.idle = queue.Queue()
+        self.started = time.time()
+        self.recycled = 0
+        self.commands = 0
+        self.lock = threading.Lock()  # Counters are bumped from handler threads
+        for _ in range(size):
+            self.idle.put(self._spawn())
+
+    def _spawn(self):
+        logger.info("Starting warm browser...")
+        return WarmBrowser()
+
+    def _recycle(self, browser):
+        browser.quit()
+        with self.lock:
+            self.recycled += 1
+        return self._spawn()
+
+    def acquire(self):
+        browser = self.idle.get()
+        # A fresh dashboard per command: stale tabs would show old quotas
+        try:
+            if browser.expired() or not browser.healthy():
+                browser = self._recycle(browser)
+        except Exception:
+            # Keep the slot: the dead browser fails its next health check and is respawned then
+            self.idle.put(browser)
+            raise
+        return browser
+
+    def release(self, browser):
+        browser.uses += 1
+        self.idle.put(browser)
+
+    def health_check(self):
+        """Checks browsers that are idle right now; busy ones are checked on acquire."""
+        for _ in range(self.idle.qsize()):
+            try:
+                browser = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if browser.expired() or not browser.healthy():
+                    browser = self._recycle(browser)
+            except Exception as e:
+                logger.error(f"Could not recycle browser: {e}")
+            self.idle.put(browser)
+
+    def status(self):
+        return {
+            "browsers": self.size,
+            "idle": self.idle.qsize(),
+            "uptime": round(time.time() - self.started),
+            "recycled": self.recycled,
+            "commands": self.commands,
+        }
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().quit()
+
+# =============================
+# Commands
+# =============================
+def book(driver):
+    # Same lease as main.py: a cron run booking the member right now is joined, not raced
+    with lease.hold(booking.GYM_CODE, "tomorrow", "daemon") as owned:
+        if not owned:
+            return {"booked": False, "busy": True}
+        if booking.already_booked():
+            return {"booked": True, "joined": True}
+        return {"booked": bool(booking.perform_booking(driver))}
+
+
+COMMANDS = {
+    "book": book,
+    "check": lambda driver: check_sessions.check_sessions(driver) or {"checked": True},
+    "reservation": lambda driver: check_reservation.check_reservation(driver) or {"checked": True},
+}
+
+
+def run_command(pool, name):
+    if name == "status":
+        return {"ok": True, **pool.status()}
+    if name not in COMMANDS:
+        return {"ok": False, "error": f"unknown command '{name}'"}
+
+    started = time.time()
+    metrics.start_run(f"daemon:{name}", engine="selenium")
+    outcome = "error"
+    browser = None
+    try:
+        with metrics.span("acquire"):
+            browser = pool.acquire()
+        if not browser.logged_in:
+            outcome = "login_failed"
+            return {"ok": False, "error": "login failed"}
+        result = COMMANDS[name](browser.driver)
+        outcome = {True: "booked", False: "not_booked"}.get(result.get("booked"), "ok")
+        if result.get("booked") is False:
+            flight_recorder.flush(f"{name} failed")
+        return {"ok": True, **result, "elapsed": round(time.time() - started, 3)}
+    except Exception as e:
+        traceback.print_exc()
+        flight_recorder.flush(f"{name} failed")
+        return {"ok": False, "error": str(e)}
+    finally:
+        metrics.finish(outcome)
+        with pool.lock:
+            pool.commands += 1
+        if browser is not None:
+            pool.release(browser)
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline().decode("utf-8").strip()
+        try:
+            name = json.loads(line).get("cmd", "")
+        except ValueError:
+            name = line
+        logger.info(f"Command: {name}")
+        response = run_command(self.server.pool, name)
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+# =============================
+# Server / Client
+# =============================
+def serve():
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)
+    os.makedirs(os.path.dirname(SOCKET_PATH) or ".", exist_ok=True)
+
+    pool = BrowserPool(DAEMON_BROWSERS)
+    server = socketserver.ThreadingUnixStreamServer(SOCKET_PATH, CommandHandler)
+    server.pool = pool
+    os.chmod(SOCKET_PATH, 0o600)
+
+    def health_loop():
+        while True:
+            time.sleep(DAEMON_HEALTH_INTERVAL)
+            pool.health_check()
+
+    threading.Thread(target=health_loop, name="health", daemon=True).start()
+    logger.info(f"Daemon ready on {SOCKET_PATH} with {DAEMON_BROWSERS} warm browser(s).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down daemon...")
+    finally:
+        server.server_close()
+        pool.close()
+        os.remove(SOCKET_PATH)
+
+
+def request(name):
+    """Sends one command to a running daemon and returns its JSON response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(SOCKET_PATH)
+        sock.sendall((json.dumps({"cmd": name}) + "\n").encode("utf-8"))
+        return json.loads(sock.makefile("r", encoding="utf-8").readline())
+
+
+if __name__ == "__main__":
+    # python daemon.py            -> run the daemon
+    # python daemon.py book|check|reservation|status -> send a command
+    if len(sys.argv) > 1:
+        print(json.dumps(request(sys.argv[1]), indent=1))
+    else:
+        serve()
@@ -0,0 +1,118 @@
+import os
+import gzip
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+from collections import deque
+
+# Constants
+DEBUG_DIR = "debug"
+LEVELS = {"off": 0, "html": 1, "full": 2}  # full = page source + screenshot
+DEBUG_CAPTURE = os.getenv("DEBUG_CAPTURE", "html").lower()
+DEBUG_CAPTURE_LIMIT = int(os.getenv("DEBUG_CAPTURE_LIMIT", "12"))  # Captures kept in memory
+DEBUG_FLUSH = os.getenv("DEBUG_FLUSH", "failure").lower()  # "failure" or "always"
+
+logger = logging.getLogger(__name__)
+
+_level = LEVELS.get(DEBUG_CAPTURE, LEVELS["html"])
+_buffer = deque(maxlen=DEBUG_CAPTURE_LIMIT)
+_lock = threading.Lock()
+_queue = queue.Queue()
+_writer = None
+
+# =============================
+# Capture (in memory)
+# =============================
+def capture(driver, name):
+    """Keeps the page source (and screenshot at level 'full') in the ring buffer. No disk I/O."""
+    if _level == 0:
+        return
+    try:
+        html = driver.page_source
+        png = driver.get_screenshot_as_png() if _level >= LEVELS["full"] else None
+    except Exception as e:
+        logger.error(f"Failed to capture debug: {e}")
+        return
+    record(name, html, png)
+
+
+def record(name, html, png=None):
+    with _lock:
+        _buffer.append((name, time.time(), html, png))
+
+# =============================
+# Flush (background writer)
+# =============================
+def flush(reason):
+    """Hands every buffered capture to the writer thread. Call when a step fails."""
+    global _writer
+    with _lock:
+        captures = list(_buffer)
+        _buffer.clear()
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="flight-recorder", daemon=True)
+            _writer.start()
+    if captures:
+        logger.info(f"Flushing {len(captures)} debug captures ({reason}).")
+        _queue.put((reason, captures))
+
+
+def close(failed=False):
+    """Flushes when the run failed (or DEBUG_FLUSH=always) and waits for pending writes."""
+    if failed or DEBUG_FLUSH == "always":
+        flush("run failed" if failed else "end of run")
+    if _writer is not None:
+        _queue.join()
+
+
+def _write_loop():
+    seen = {}  # content hash -> file already written this run
+    while True:
+        reason, captures = _queue.get()
+        try:
+            os.makedirs(DEBUG_DIR, exist_ok=True)
+            manifest_path = os.path.join(DEBUG_DIR, "captures.json")
+            try:
+                with open(manifest_path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = []
+
+            for name, ts, html, png in captures:
+                entry = {"name": name, "time": ts, "reason": reason}
+                entry["html"] = _write_once(seen, name, ".html.gz", html.encode("utf-8"), compress=True)
+                if png is not None:
+                    entry["png"] = _write_once(seen, name, ".png", png, compress=False)
+                manifest.append(entry)
+
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1)
+            logger.info(f"Debug captures written to {DEBUG_DIR}/ ({reason}).")
+        except Exception as e:
+            logger.error(f"Failed to write debug captures: {e}")
+        finally:
+            _queue.task_done()
+
+
+def _write_once(seen, name, ext, data, compress):
+    # The digest in the file name keeps every manifest entry pointing at its own content,
+    # across repeated captures and runs; identical pages are still stored once
+    digest = hashlib.sha1(data).hexdigest()
+    if digest in seen:
+        return seen[digest]
+    filename = f"{name}-{digest[:12]}{ext}"
+    path = os.path.join(DEBUG_DIR, filename)
+    if os.path.exists(path):
+        seen[digest] = filename
+        return filename
+    if compress:
+        with gzip.open(path, "wb", compresslevel=6) as f:
+            f.write(data)
+    else:
+        with open(path, "wb") as f:
+            f.write(data)
+    seen[digest] = filename
+    return filename
@@ -0,0 +1,291 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import slot_parser
+
+# Constants
+WEB_URL = os.getenv("SITE_URL", "https://performancelab.my.id/")  # Point at standin_site.py for offline runs
+DASHBOARD_URL = WEB_URL.rstrip("/") + "/dashboard.php"
+DAY_URL = os.getenv("DAY_URL", DASHBOARD_URL + "?day={day}")  # Day view used when a .date-btn has no link of its own
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))  # Seconds per request
+SCAN_WORKERS = 8  # Day views fetched at once; matches the connection pool size
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Markers that prove #membership-warning is hidden without evaluating CSS
+HIDDEN_CLASSES = {"hidden", "d-none", "hide"}
+
+logger = logging.getLogger(__name__)
+
+_day_urls = {}  # data-day -> view URL, learned from the dashboard
+
+
+class HttpEngineError(Exception):
+    """The site did not look the way the HTTP engine expects; callers fall back to Selenium."""
+
+
+# =============================
+# HTML Parsing
+# =============================
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class _DashboardParser(HTMLParser):
+    """Collects forms, date tabs, membership info and each .session-slot's button and form in one pass.
+
+    What a slot shows (quota, state, booking code) is read by slot_parser.parse().
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms = []
+        self.date_buttons = []
+        self.active_day = None
+        self.membership_status = None
+        self.warning_present = False
+        self.warning_hidden = False
+        self.slots = []
+        self._stack = []  # (tag, roles) for every open element
+        self._form = None
+        self._slot = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v or "") for k, v in attrs}
+        classes = set(attrs.get("class", "").split())
+        roles = set()
+
+        if tag == "form":
+            self._form = {"action": attrs.get("action", ""), "method": attrs.get("method", "get").lower(), "inputs": {}}
+            self.forms.append(self._form)
+            if self._slot is not None and self._slot["form"] is None:
+                self._slot["form"] = self._form  # One form per slot
+            roles.add("form")
+        elif tag in ("input", "select", "textarea") and self._form is not None and attrs.get("name"):
+            if attrs.get("type", "").lower() not in ("submit", "button", "checkbox", "radio") or "checked" in attrs:
+                self._form["inputs"][attrs["name"]] = attrs.get("value", "")
+
+        if "date-btn" in classes and attrs.get("data-day"):
+            day = attrs["data-day"]
+            self.date_buttons.append({"day": day, "href": attrs.get("href") or attrs.get("data-url", "")})
+            if "active" in classes or attrs.get("aria-selected") == "true" or attrs.get("aria-pressed") == "true":
+                self.active_day = day
+
+        if "membership-status" in classes:
+            self.membership_status = ""
+            roles.add("membership")
+        if attrs.get("id") == "membership-warning":
+            self.warning_present = True
+            style = attrs.get("style", "").replace(" ", "").lower()
+            self.warning_hidden = "hidden" in attrs or "display:none" in style or bool(classes & HIDDEN_CLASSES)
+
+        if "session-slot" in classes:
+            # Only a form opened inside the slot is its booking form; a page-wide one may be anything (e.g. logout)
+            self._slot = {"session_id": attrs.get("data-session-id", ""), "button": None, "form": None}
+            self.slots.append(self._slot)
+            roles.add("slot")
+        elif self._slot is not None and tag == "button" and self._slot["button"] is None:
+            self._slot["button"] = attrs
+
+        if tag not in VOID_TAGS:
+            self._stack.append((tag, roles))
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed children by unwinding to the matching open tag
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                for _, roles in self._stack[i:]:
+                    if "slot" in roles:
+                        self._slot = None
+                    if "form" in roles:
+                        self._form = None
+                del self._stack[i:]
+                return
+
+    def handle_data(self, data):
+        active = set()
+        for _, roles in self._stack:
+            active |= roles
+        if "membership" in active:
+            self.membership_status += data
+
+
+def parse_page(html):
+    parser = _DashboardParser()
+    parser.feed(html)
+    parser.close()
+    if parser.membership_status is not None:
+        parser.membership_status = " ".join(parser.membership_status.split())
+    parser.snapshot = slot_parser.parse(html)
+    return parser
+
+
+# =============================
+# Session
+# =============================
+def create_session():
+    """Pooled keep-alive session; every request after the first reuses the same TLS connection."""
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET", "HEAD"))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+def _get(session, url):
+    try:
+        resp = session.get(url, timeout=HTTP_TIMEOUT)
+        resp.raise_for_status()
+        return resp
+    except requests.RequestException as e:
+        raise HttpEngineError(f"GET {url} failed: {e}") from e
+
+
+def _submit(session, form, base_url, data):
+    url = urljoin(base_url, form["action"] or base_url)
+    try:
+        if form["method"] == "post":
+            resp = session.post(url, data=data, timeout=HTTP_TIMEOUT)
+        else:
+            resp = session.get(url, params=data, timeout=HTTP_TIMEOUT)
+        resp.raise_for_status()
+        return resp
+    except requests.RequestException as e:
+        raise HttpEngineError(f"{form['method'].upper()} {url} failed: {e}") from e
+
+
+# =============================
+# Login
+# =============================
+def login(session, code, name):
+    """Posts the kode/nama form and returns the membership status text."""
+    resp = _get(session, WEB_URL)
+    page = parse_page(resp.text)
+    form = next((f for f in page.forms if "kode" in f["inputs"] or "nama" in f["inputs"]), None)
+    if form is None:
+        raise HttpEngineError("Login form with 'kode' field not found")
+
+    data = dict(form["inputs"])
+    data["kode"] = code
+    data["nama"] = name
+    resp = _submit(session, form, resp.url, data)
+    if "dashboard.php" not in resp.url:
+        raise HttpEngineError(f"Login did not reach dashboard (landed on {resp.url})")
+
+    return verify_dashboard(parse_page(resp.text))
+
+
+def verify_dashboard(page):
+    """Returns the membership status text of a parsed dashboard page."""
+    if page.membership_status is None:
+        raise HttpEngineError("Dashboard has no .membership-status element")
+    if page.warning_present and not page.warning_hidden:
+        # Visibility may be decided by CSS/JS, which only the browser can evaluate
+        raise HttpEngineError("Cannot tell whether #membership-warning is displayed")
+    return page.membership_status
+
+
+# =============================
+# Dashboard / Day Views
+# =============================
+def fetch_dashboard(session):
+    resp = _get(session, DASHBOARD_URL)
+    if "dashboard.php" not in resp.url:
+        raise HttpEngineError("Session is not logged in")
+    return resp.url, parse_page(resp.text)
+
+
+def fetch_day(session, day):
+    """Loads the view for a data-day tab and returns (url, parsed page)."""
+    # Repeat polls go straight to the day view found the first time: one round trip
+    if day in _day_urls:
+        resp = _get(session, _day_urls[day])
+        page = parse_page(resp.text)
+        if page.active_day == day and page.snapshot and "dashboard.php" in resp.url:
+            return resp.url, page
+        _day_urls.pop(day, None)
+
+    dashboard_url, dashboard = fetch_dashboard(session)
+    if dashboard.active_day == day and dashboard.snapshot:
+        return dashboard_url, dashboard
+
+    button = next((b for b in dashboard.date_buttons if b["day"] == day), None)
+    if button is None:
+        raise HttpEngineError(f"No .date-btn[data-day='{day}'] on dashboard")
+    url = urljoin(dashboard_url, button["href"]) if button["href"] else DAY_URL.format(day=day)
+
+    resp = _get(session, url)
+    page = parse_page(resp.text)
+    # Never trust slots unless the page proves it is showing the requested day
+    if page.active_day != day:
+        raise HttpEngineError(f"Day view for '{day}' did not mark that tab active")
+    if not page.snapshot:
+        raise HttpEngineError(f"No .session-slot elements in '{day}' view")
+    _day_urls[day] = url
+    return resp.url, page
+
+
+def fetch_days(session, days=None):
+    """Loads several day views at once and returns {day: (url, parsed page)} in tab order.
+
+    days=None means every .date-btn[data-day] the dashboard exposes. The scan
+    takes as long as the slowest day rather than the sum of all of them.
+    """
+    dashboard_url, dashboard = fetch_dashboard(session)
+    tabs = [b["day"] for b in dashboard.date_buttons]
+    if days is None:
+        days = tabs
+    for button in dashboard.date_buttons:
+        # Candidate view URLs; fetch_day() still checks the active tab before trusting one
+        if button["href"] and button["day"] not in _day_urls:
+            _day_urls[button["day"]] = urljoin(dashboard_url, button["href"])
+
+    results = {}
+    if dashboard.active_day in days and dashboard.snapshot:
+        results[dashboard.active_day] = (dashboard_url, dashboard)  # Already have it
+    pending = [day for day in days if day not in results]
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(len(pending), SCAN_WORKERS)) as pool:
+            results.update(zip(pending, pool.map(lambda day: fetch_day(session, day), pending)))
+    return {day: results[day] for day in days}
+
+
+# =============================
+# Booking
+# =============================
+def book_slot(session, page_url, page, session_id):
+    """Submits the form behind a slot's button and returns the parsed result page."""
+    slot = next((raw for raw in page.slots if raw["session_id"] == str(session_id)), None)
+    if slot is None or slot["button"] is None:
+        raise HttpEngineError(f"Session {session_id} has no button")
+    button = slot["button"]
+    if button.get("type", "submit").lower() != "submit" or "disabled" in button:
+        # e.g. <button type="button" onclick="book(6)">: booking needs the page's JS
+        raise HttpEngineError(f"Session {session_id} button does not submit a form")
+    form = slot["form"]
+    if form is None:
+        raise HttpEngineError(f"Session {session_id} has no form of its own")
+
+    data = dict(form["inputs"])
+    if button.get("name"):
+        data[button["name"]] = button.get("value", "")
+    if button.get("formaction"):
+        form = dict(form, action=button["formaction"])
+    resp = _submit(session, form, page_url, data)
+    return parse_page(resp.text)
+
+
+def book_and_verify(session, page_url, page, session_id, day="tomorrow"):
+    """Books a slot and returns its Slot once it shows reserved-by-user, else None."""
+    result = book_slot(session, page_url, page, session_id)
+    booked = next((slot for slot in result.snapshot if slot.session_id == session_id), None)
+    if booked is None or not booked.reserved:
+        # The result page may not be the day view; re-read it before judging
+        _, page = fetch_day(session, day)
+        booked = next((slot for slot in page.snapshot if slot.session_id == session_id), None)
+    return booked if booked is not None and booked.reserved else None
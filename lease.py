@@ -0,0 +1,89 @@
+import os
+import json
+import time
+import fcntl
+import logging
+from contextlib import contextmanager
+import session_cache
+import ledger
+
+# Constants
+LEASE_DIR = os.path.join(session_cache.CACHE_DIR, "leases")
+LEASE_WAIT = float(os.getenv("LEASE_WAIT", "120"))  # Seconds a second invocation waits to join the first; 0 exits at once
+LEASE_POLL = 0.2
+
+logger = logging.getLogger(__name__)
+
+
+# =============================
+# Leases
+# =============================
+def _path(code, day):
+    # One lock file per member and site date; the member code is hashed like everywhere else
+    return os.path.join(LEASE_DIR, f"{ledger._member(code)}-{ledger.day_date(day)}.lock")
+
+
+def holder(code, day="tomorrow"):
+    """Who holds (or last held) the lease, as written by the holder; None when never taken."""
+    try:
+        with open(_path(code, day), encoding="utf-8") as f:
+            return json.loads(f.read() or "null")
+    except (OSError, ValueError):
+        return None
+
+
+def _prune():
+    # Locks for dates the ledger no longer keeps are dead weight in the cached state
+    cutoff = time.time() - ledger.LEDGER_KEEP_DAYS * 86400
+    for name in os.listdir(LEASE_DIR):
+        path = os.path.join(LEASE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _try_lock(fd):
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+@contextmanager
+def hold(code, day="tomorrow", owner="", wait=None):
+    """Exclusive lease on one member's booking for one site date.
+
+    Yields True once this invocation owns the work, possibly after waiting up to
+    `wait` seconds for another holder to finish (callers then read its result from
+    the ledger). Yields False when the other holder is still busy after that. The
+    lock is an flock, so a crashed holder never leaves it stuck.
+    """
+    wait = LEASE_WAIT if wait is None else wait
+    path = _path(code, day)
+    os.makedirs(LEASE_DIR, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        owned = _try_lock(fd)
+        if not owned:
+            other = holder(code, day) or {}
+            logger.info(f"Booking for {ledger.day_date(day)} in flight elsewhere ({other.get('owner') or 'unknown'}, "
+                        f"pid {other.get('pid')}); waiting up to {wait:.0f}s.")
+            deadline = time.time() + wait
+            while not owned and time.time() < deadline:
+                time.sleep(LEASE_POLL)
+                owned = _try_lock(fd)
+        if not owned:
+            yield False
+            return
+        _prune()
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, json.dumps({"owner": owner, "pid": os.getpid(), "since": time.time()}).encode("utf-8"), 0)
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
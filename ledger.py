@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+import session_cache
+
+# Constants
+LEDGER_FILE = os.path.join(session_cache.CACHE_DIR, "ledger.json")
+LEDGER_TRUST = float(os.getenv("LEDGER_TRUST", "21600"))  # Seconds a verified entry is believed without looking; 0 always verifies
+LEDGER_KEEP_DAYS = 14  # Entries older than this are dropped on write
+SITE_UTC_OFFSET = float(os.getenv("SITE_UTC_OFFSET", "7"))  # Hours; the site's calendar (WIB) decides what "tomorrow" is
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()  # Roster workers write from several threads
+
+
+# =============================
+# Keys
+# =============================
+def _member(code):
+    # Same hashing as session_cache: member codes never land on disk in clear
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+
+
+def day_date(day, at=None):
+    """ISO date a data-day tab stands for on the site's calendar ("today", "tomorrow" or already a date)."""
+    if day not in ("today", "tomorrow"):
+        return day
+    local = datetime.fromtimestamp(at or time.time(), tz=timezone(timedelta(hours=SITE_UTC_OFFSET)))
+    return (local.date() + timedelta(days=1 if day == "tomorrow" else 0)).isoformat()
+
+# =============================
+# Storage
+# =============================
+def _load():
+    try:
+        with open(LEDGER_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(data):
+    cutoff = (datetime.now(timezone.utc).date() - timedelta(days=LEDGER_KEEP_DAYS)).isoformat()
+    for member in data.values():
+        for date in [d for d in member if d < cutoff]:
+            del member[date]
+    try:
+        os.makedirs(os.path.dirname(LEDGER_FILE) or ".", exist_ok=True)
+        tmp = LEDGER_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, LEDGER_FILE)
+    except OSError as e:
+        logger.warning(f"Could not write reservation ledger: {e}")
+
+
+def record(code, day, session_id, booking_code, source="booking", at=None):
+    """Writes (or refreshes) a member's reservation for a day."""
+    at = at or time.time()
+    date = day_date(day, at)
+    with _lock:
+        data = _load()
+        entries = data.setdefault(_member(code), {})
+        previous = entries.get(date, {})
+        entries[date] = {
+            "session_id": int(session_id),
+            "booking_code": booking_code or previous.get("booking_code", ""),
+            "booked_at": previous.get("booked_at", at),
+            "verified_at": at,
+            "source": source,
+        }
+        _save(data)
+    logger.info(f"Ledger: session {session_id} on {date} ({source}).")
+
+
+def forget(code, day, at=None):
+    date = day_date(day, at)
+    with _lock:
+        data = _load()
+        if data.get(_member(code), {}).pop(date, None) is not None:
+            _save(data)
+            logger.info(f"Ledger: dropped {date}, the site shows no reservation.")
+
+
+def lookup(code, day, at=None):
+    """The ledger entry for a member's day, or None."""
+    return _load().get(_member(code), {}).get(day_date(day, at))
+
+
+def fresh(entry, now=None):
+    """True while an entry is young enough to believe without looking at the site."""
+    return entry is not None and (now or time.time()) - entry["verified_at"] <= LEDGER_TRUST
+
+
+def sync(code, snapshots, source="scan", at=None):
+    """Brings the ledger in line with scanned day tabs ({day: [Slot]}): what the site shows wins."""
+    for day, snapshot in snapshots.items():
+        reserved = next((slot for slot in snapshot if slot.reserved), None)
+        if reserved is not None:
+            record(code, day, reserved.session_id, reserved.booking_code, source, at)
+        elif snapshot:
+            forget(code, day, at)
@@ -2,19 +2,33 @@ import os
 import logging
 import traceback
 import time  # Added this import to fix the 'time' not defined error
-import requests
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import http_engine
+import browser
+import slots
+import release_mode
+import session_cache
+import flight_recorder
+import metrics
+import network_log
+import waits
+import slot_history
+import ledger
+import slot_parser
+import lease
+from notify import send_log
 
 # Constants
-WEB_URL = "https://performancelab.my.id/"
-DASHBOARD_URL = "https://performancelab.my.id/dashboard.php"
-TIMEOUT = 10  # Seconds for WebDriverWait
+WEB_URL = os.getenv("SITE_URL", "https://performancelab.my.id/")  # Point at standin_site.py for offline runs
+DASHBOARD_URL = WEB_URL.rstrip("/") + "/dashboard.php"
+ENGINE = os.getenv("ENGINE", "http").lower()  # "http" tries the browserless engine first, "selenium" skips it
+BOOKING_MODE = os.getenv("BOOKING_MODE", "now").lower()  # "now" books immediately, "release" waits for RELEASE_TIME, "shadow" stops before the click
+CONFIRM_TIMEOUT = float(os.getenv("CONFIRM_TIMEOUT", "5"))  # Seconds to wait for the slot to turn reserved
+CLICK_TIMEOUT = 2  # Seconds for a scanned slot's button to become clickable
+PREFERRED_SESSIONS = [int(s) for s in os.getenv("PREFERRED_SESSIONS", "").replace(" ", "").split(",") if s]  # e.g. "6,5,4"; empty uses slot history, else 6..1
+BOOK_ROUNDS = int(os.getenv("BOOK_ROUNDS", "2"))  # Tab reloads after every candidate on the loaded tab failed
+RETRY_PAUSE = float(os.getenv("RETRY_PAUSE", "0.5"))  # Seconds before such a reload
 
 # Environment variables
 GYM_CODE = os.getenv("GYM_CODE", "")
@@ -32,75 +46,60 @@ def notify(msg):
     logger.info(f"[NOTIFY] {msg}")
     if not DISCORD_WEBHOOK:
         return
-    try:
-        requests.post(DISCORD_WEBHOOK, json={"content": msg}, timeout=5)
-    except Exception as e:
-        logger.error(f"Failed to send Discord notification: {e}")
+    # Queued and sent in the background; never blocks the booking path
+    send_log(msg)
 
 # =============================
 # Screenshot + HTML Dump
 # =============================
 def debug_capture(driver, name):
-    os.makedirs("debug", exist_ok=True)
-    try:
-        driver.save_screenshot(f"debug/{name}.png")
-        with open(f"debug/{name}.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-        logger.info(f"Debug capture saved: {name}")
-    except Exception as e:
-        logger.error(f"Failed to capture debug: {e}")
+    # Kept in memory; written to debug/ only when the run fails (see flight_recorder)
+    flight_recorder.capture(driver, name)
 
 # =============================
 # Create Driver
 # =============================
-def create_driver():
-    logger.info("Starting Chrome driver...")
-    chrome_opts = Options()
-    chrome_opts.add_argument("--headless=new")
-    chrome_opts.add_argument("--no-sandbox")
-    chrome_opts.add_argument("--disable-dev-shm-usage")
-    chrome_opts.add_argument("--window-size=1366,768")
-    chrome_opts.add_argument("--disable-gpu")
-    chrome_opts.add_argument("--disable-extensions")
-    chrome_opts.add_argument("--disable-images")  # Speed up loading
-    chrome_opts.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    
-    # For GitHub Actions compatibility
-    chrome_opts.binary_location = "/usr/bin/google-chrome-stable"
-    
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=chrome_opts
-    )
-    logger.info("Chrome driver started successfully.")
-    return driver
+def create_driver(code=GYM_CODE):
+    # Shared Chrome profile; BROWSER_PROFILE=full restores the old one (see browser.py).
+    # The saved session loads while Chrome launches
+    return browser.start(code)
 
 # =============================
 # Login Function
 # =============================
-def login(driver):
-    logger.info("Navigating to login page...")
-    driver.get(WEB_URL)
-    
-    try:
-        WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.NAME, "kode")))
+@metrics.timed("login")
+@network_log.step("login")
+def login(driver, code=GYM_CODE, name=GYM_NAME):
+    # Cached cookies skip the form entirely when the dashboard still accepts them
+    restored = session_cache.restore_driver(driver, code)
+    slot_history.load()  # Read SQLite now so candidates() only sees the cached profile
+
+    def submit_form():
+        # Safe to repeat: every attempt starts from a fresh login page
+        logger.info("Navigating to login page...")
+        driver.get(WEB_URL)
+        waits.until(driver, EC.presence_of_element_located((By.NAME, "kode")), "login_page")
         debug_capture(driver, "01_login_page_loaded")
-        
+
         logger.info("Filling login form...")
-        driver.find_element(By.NAME, "kode").send_keys(GYM_CODE)
-        driver.find_element(By.NAME, "nama").send_keys(GYM_NAME)
+        driver.find_element(By.NAME, "kode").send_keys(code)
+        driver.find_element(By.NAME, "nama").send_keys(name)
         debug_capture(driver, "02_login_form_filled")
-        
+
         logger.info("Submitting login...")
-        submit_btn = WebDriverWait(driver, TIMEOUT).until(EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']")))
+        submit_btn = waits.until(driver, EC.element_to_be_clickable((By.XPATH, "//button[@type='submit']")), "login_submit")
         submit_btn.click()
-        
-        WebDriverWait(driver, TIMEOUT).until(lambda d: "dashboard.php" in d.current_url)
+
+        waits.until(driver, lambda d: "dashboard.php" in d.current_url, "login_redirect")
         debug_capture(driver, "03_after_login_attempt")
+
+    try:
+        if not restored:
+            waits.retry(submit_form, "login")
         
         # New: Check for membership status on dashboard
         logger.info("Verifying dashboard and membership status...")
-        membership_elem = WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.CLASS_NAME, "membership-status")))
+        membership_elem = waits.until(driver, EC.presence_of_element_located((By.CLASS_NAME, "membership-status")), "membership")
         membership_text = membership_elem.text
         logger.info(f"Membership status: {membership_text}")
         notify(f"*{membership_text}*")
@@ -110,122 +109,418 @@ def login(driver):
         if warning_elem.is_displayed():
             logger.warning("Membership has expired!")
             notify("⚠ Masa aktif membership telah berakhir. Tidak bisa booking.")
+            session_cache.invalidate(code)
             return False
         
         logger.info("Login and dashboard verification successful.")
+        session_cache.save_driver(driver, code, membership_text)
         notify(">> Login Success")
         return True
     except Exception as e:
         logger.error(f"Login failed: {e}")
         debug_capture(driver, "03_login_failed")
+        session_cache.invalidate(code)
         notify(">> Login Failed, Please Check")
         return False
 
 # =============================
 # Booking Function
 # =============================
-def perform_booking(driver):
+@metrics.timed("tomorrow_tab")
+def open_tomorrow_tab(driver):
+    return open_day_tab(driver, "tomorrow")
+
+def open_day_tab(driver, day):
     logger.info("Checking dashboard...")
     
     if DASHBOARD_URL not in driver.current_url:
         driver.get(DASHBOARD_URL)
-        WebDriverWait(driver, TIMEOUT).until(EC.url_contains("dashboard.php"))
+        waits.until(driver, EC.url_contains("dashboard.php"), "dashboard")
     
     debug_capture(driver, "04_dashboard_loaded")
     
-    logger.info("Clicking tomorrow tab...")
+    logger.info(f"Clicking {day} tab...")
+    def click_day():
+        waits.until(driver, EC.element_to_be_clickable((By.CSS_SELECTOR, f".date-btn[data-day='{day}']")), "tab_button").click()
+        waits.until(driver, lambda d: d.execute_script(slots.DAY_READY_JS, day), "tab_slots")  # Wait for slots to load
+
     try:
-        tomorrow_btn = WebDriverWait(driver, TIMEOUT).until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".date-btn[data-day='tomorrow']")))
-        tomorrow_btn.click()
-        WebDriverWait(driver, TIMEOUT).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".session-slot")))  # Wait for slots to load
-        debug_capture(driver, "05_tomorrow_tab_clicked")
+        waits.retry(click_day, f"{day}_tab")
+        debug_capture(driver, f"05_{day}_tab_clicked")
     except Exception as e:
-        logger.error(f"Could not click tomorrow tab: {e}")
-        notify(">> Could not click tomorrow tab")
+        logger.error(f"Could not click {day} tab: {e}")
+        notify(f">> Could not click {day} tab")
         return False
-        
-    # Check if already reserved (look for "reserved-by-user" class or similar)
-    reserved_slots = driver.find_elements(By.CSS_SELECTOR, ".session-slot.reserved-by-user")
-    if reserved_slots:
-        logger.info("Slot already reserved for tomorrow.")
-        notify(">> Slot already reserved for tomorrow")
+    return True
+
+@metrics.timed("perform_booking")
+@network_log.step("perform_booking")
+def perform_booking(driver, preferences=None, code=GYM_CODE):
+    if not open_tomorrow_tab(driver):
+        return False
+    return book_on_tab(driver, preferences=preferences, code=code)
+
+def remember(snapshot, code, source, day="tomorrow"):
+    """Writes the reserved slot of a day tab's snapshot to the reservation ledger."""
+    reserved = next((slot for slot in snapshot if slot.reserved), None)
+    if reserved is not None:
+        ledger.record(code, day, reserved.session_id, reserved.booking_code, source)
+
+def already_booked(code=GYM_CODE, day="tomorrow"):
+    """True when the ledger holds a fresh booking for the day, e.g. made by a run that held the lease."""
+    entry = ledger.lookup(code, day)
+    if not ledger.fresh(entry):
+        return False
+    logger.info(f"Ledger shows session {entry['session_id']} booked for {day} ({entry['source']}); nothing to do.")
+    notify(f">> Already booked for {day}: session {entry['session_id']} ({entry['booking_code']})")
+    return True
+
+def candidates(snapshot, preferences=None):
+    """Session ids worth trying on this snapshot, best first."""
+    return slots.pick(snapshot, preferences or PREFERRED_SESSIONS or slot_history.priority(snapshot))
+
+def click_slot(driver, session_id):
+    """Clicks one slot and waits for the outcome. Returns True once it shows reserved."""
+    logger.info(f"Selected session ID {session_id} for booking.")
+    notify(f">>Session found, booking session {session_id}...")
+    # No capture before the click: page_source is a full round trip on the booking path
+
+    logger.info("Clicking selected session...")
+    btn = waits.until(driver, EC.element_to_be_clickable(slots.find_button(driver, session_id)), "slot_button", CLICK_TIMEOUT)
+    driver.execute_script("arguments[0].scrollIntoView(true);", btn)
+    slots.watch_booking(driver, session_id)
+    clicked_at = time.perf_counter()
+    btn.click()
+
+    # Handle the confirmation alert
+    try:
+        waits.until(driver, EC.alert_is_present(), "confirm_alert", 5)
+        alert = driver.switch_to.alert
+        logger.info(f"Accepting confirmation alert: {alert.text}")
+        alert.accept()  # Click "OK" to confirm
+    except Exception as e:
+        logger.warning(f"No alert found or failed to handle: {e}")
+
+    # Wait for the slot to turn reserved-by-user (or full, or the booking request to fail)
+    outcome, latency = slots.wait_for_booking(driver, session_id, CONFIRM_TIMEOUT, clicked_at)
+    metrics.record("click_to_confirm", latency)
+    debug_capture(driver, f"07_after_click_session_{session_id}")
+
+    if outcome in ("reserved", "success-message"):
+        logger.info(f"Booking successful ({outcome}, {latency * 1000:.0f} ms after click).")
+        notify(f">> Booking successful for *session {session_id}*")
+        return True
+    logger.warning(f"Session {session_id} not booked; outcome {outcome} after {latency * 1000:.0f} ms.")
+    return False
+
+def book_candidates(driver, snapshot, preferences=None, day="tomorrow"):
+    """Walks the candidates on the loaded tab. True booked, False nothing open, None all candidates failed."""
+    order = candidates(snapshot, preferences)
+    if not order:
+        logger.warning("No available sessions found.")
+        notify(">> No available sessions found")
+        return False
+
+    tried = set()
+    while True:
+        remaining = [session_id for session_id in order if session_id not in tried]
+        if not remaining:
+            return None
+        session_id = remaining[0]
+        tried.add(session_id)
+        try:
+            if click_slot(driver, session_id):
+                return True
+        except Exception as e:
+            logger.warning(f"Could not book session {session_id}: {e}")
+
+        # The click may have re-rendered the tab: one round trip tells what is still open
+        if not driver.execute_script(slots.DAY_READY_JS, day):
+            return None
+        snapshot = slots.snapshot(driver)
+        if any(slot.reserved for slot in snapshot):
+            logger.info("Slot shows reserved after all.")
+            notify(">> Booking successful")
+            return True
+        still_open = set(slots.pick(snapshot))
+        order = [session_id for session_id in order if session_id in still_open]
+        if any(session_id not in tried for session_id in order):
+            notify(f">> Session {session_id} taken, trying the next one...")
+
+@metrics.timed("book_slot")
+def book_on_tab(driver, snapshot=None, preferences=None, code=GYM_CODE, day="tomorrow"):
+    # One execute_script round trip for every slot on the tab
+    if snapshot is None:
+        snapshot = waits.retry(lambda: slots.snapshot(driver), "slot_scan")
+    observed_at = time.time()
+
+    # Check if already reserved ("reserved-by-user" class)
+    if any(slot.reserved for slot in snapshot):
+        logger.info(f"Slot already reserved for {day}.")
+        notify(f">> Slot already reserved for {day}")
+        remember(snapshot, code, "page", day)
         return True  # Consider this a success to avoid re-booking
         
     logger.info("Scanning available sessions...")
     notify(">> Looking for sessions...")
     try:
-        # Wait for available slots to appear (in case they're loaded dynamically)
-        WebDriverWait(driver, TIMEOUT).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".session-slot")))
-        slots = driver.find_elements(By.CSS_SELECTOR, ".session-slot.available")
-        if not slots:
-            logger.warning("No available sessions found.")
-            notify(">> No available sessions found")
-            return False
-        
-        # Collect available sessions with their IDs
-        available_sessions = []
-        for slot in slots:
-            session_id = int(slot.get_attribute("data-session-id"))
-            available_sessions.append((session_id, slot))
-        
-        # Sort by session_id descending (6, 5, 4, 3, 2, 1)
-        available_sessions.sort(key=lambda x: x[0], reverse=True)
-        
-        # Pick the highest priority (first in sorted list)
-        chosen_session_id, chosen_slot = available_sessions[0]
-        logger.info(f"Selected session ID {chosen_session_id} for booking.")
-        notify(f">>Session found, booking session {chosen_session_id}...")
-        debug_capture(driver, "06_found_available_slots")
-        
-        logger.info("Clicking selected session...")
-        btn = WebDriverWait(driver, TIMEOUT).until(EC.element_to_be_clickable(chosen_slot.find_element(By.TAG_NAME, "button")))
-        driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-        btn.click()
-        
-        # Handle the confirmation alert
-        try:
-            WebDriverWait(driver, 5).until(EC.alert_is_present())
-            alert = driver.switch_to.alert
-            logger.info(f"Accepting confirmation alert: {alert.text}")
-            alert.accept()  # Click "OK" to confirm
-        except Exception as e:
-            logger.warning(f"No alert found or failed to handle: {e}")
-        
-        # Wait for potential confirmation (e.g., modal or page update)
-        time.sleep(2)  # Short wait; adjust if needed
-        debug_capture(driver, "07_after_click_session")
-        
-        # Check for success (e.g., look for a success message or updated class)
-        # Based on HTML, you might need to inspect for a specific element after booking
-        success_indicators = driver.find_elements(By.CSS_SELECTOR, ".success-message")  # Placeholder; replace with actual selector
-        if success_indicators or "reserved" in driver.page_source.lower():
-            logger.info("Booking successful.")
-            notify(f">> Booking successful for *session {chosen_session_id}*")
-            return True
-        else:
-            logger.warning("Booking may have failed; no success indicator found.")
-            notify(">> Please check, booking may have failed")
-            return False
+        for round_no in range(BOOK_ROUNDS + 1):
+            if round_no:
+                # Every candidate on the loaded tab failed; only now pay for a reload
+                logger.info(f"Reloading {day} for another round ({round_no}/{BOOK_ROUNDS})...")
+                time.sleep(RETRY_PAUSE)
+                snapshot = reload_day(driver, day)
+                observed_at = time.time()
+            booked = book_candidates(driver, snapshot, preferences, day)
+            slot_history.record(day, snapshot, observed_at)  # After the clicks: keeps SQLite off the hot path
+            if booked:
+                # The booking code only shows on the re-rendered tab
+                remember(waits.retry(lambda: slots.snapshot(driver), "slot_scan"), code, "booking", day)
+            if booked is not None:
+                return booked
+        notify(">> Please check, booking may have failed")
+        return False
     except Exception as e:
         logger.error(f"Unable to book session: {e}")
         notify(">> Unable to book session")
         return False
 
+# =============================
+# Browserless Booking
+# =============================
+@metrics.timed("login")
+def login_http(code=GYM_CODE, name=GYM_NAME):
+    session = http_engine.create_session()
+    slot_history.load()  # Read SQLite now so candidates() only sees the cached profile
+    logger.info("Logging in over HTTP...")
+    membership_text = session_cache.login_http(session, code, name)
+    logger.info(f"Membership status: {membership_text}")
+    notify(f"*{membership_text}*")
+    notify(">> Login Success")
+    return session
+
+@metrics.timed("book_slot")
+def book_http(session, page_url, page, preferences=None, code=GYM_CODE, day="tomorrow"):
+    if any(slot.reserved for slot in page.snapshot):
+        logger.info(f"Slot already reserved for {day}.")
+        notify(f">> Slot already reserved for {day}")
+        remember(page.snapshot, code, "page", day)
+        return True
+
+    logger.info("Scanning available sessions...")
+    notify(">> Looking for sessions...")
+    # Same priority as the browser path
+    order = candidates(page.snapshot, preferences)
+    if not order:
+        logger.warning("No available sessions found.")
+        notify(">> No available sessions found")
+        return False
+
+    observed_at = time.time()
+    first_snapshot = page.snapshot
+    tried = set()
+    try:
+        while True:
+            remaining = [session_id for session_id in order if session_id not in tried]
+            if not remaining:
+                break
+            chosen_session_id = remaining[0]
+            tried.add(chosen_session_id)
+            logger.info(f"Selected session ID {chosen_session_id} for booking.")
+            notify(f">>Session found, booking session {chosen_session_id}...")
+
+            clicked_at = time.perf_counter()
+            booked = http_engine.book_and_verify(session, page_url, page, chosen_session_id, day)
+            metrics.record("click_to_confirm", time.perf_counter() - clicked_at)
+            if booked:
+                logger.info(f"Booking successful ({(time.perf_counter() - clicked_at) * 1000:.0f} ms after submit).")
+                notify(f">> Booking successful for *session {chosen_session_id}*")
+                ledger.record(code, day, booked.session_id, booked.booking_code)
+                return True
+
+            # Lost the race for this one; the next candidate needs a fresh form
+            logger.warning(f"Session {chosen_session_id} not marked reserved, trying the next one.")
+            page_url, page = http_engine.fetch_day(session, day)
+            if any(slot.reserved for slot in page.snapshot):
+                notify(">> Booking successful")
+                remember(page.snapshot, code, "booking", day)
+                return True
+            still_open = set(slots.pick(page.snapshot))
+            order = [session_id for session_id in order if session_id in still_open]
+    finally:
+        slot_history.record(day, first_snapshot, observed_at)  # After the clicks: keeps SQLite off the hot path
+    logger.warning("Booking may have failed; no candidate marked reserved.")
+    notify(">> Please check, booking may have failed")
+    return False
+
+def run_http():
+    """Login + booking over plain HTTP. Returns True/False, or None to fall back to Selenium."""
+    try:
+        session = login_http()
+        with metrics.span("tomorrow_tab"):
+            page_url, page = http_engine.fetch_day(session, "tomorrow")
+        return book_http(session, page_url, page)
+    except http_engine.HttpEngineError as e:
+        logger.warning(f"HTTP engine unavailable, falling back to Selenium: {e}")
+        return None
+
+# =============================
+# Release-time Booking
+# =============================
+def run_release_http(started):
+    """Pre-positions over HTTP and polls tomorrow's view around RELEASE_TIME. None falls back to Selenium."""
+    try:
+        session = login_http()
+        http_engine.fetch_day(session, "tomorrow")
+        offset, _ = release_mode.estimate_clock_offset(session)
+        start_at, deadline, on_time = release_mode.schedule(offset, started, slot_history.window())
+        notify(">> Waiting for session release...")
+
+        with metrics.span("release_poll"):
+            found, opened = release_mode.poll(
+                lambda: http_engine.fetch_day(session, "tomorrow"),
+                lambda result: release_mode.ready(result[1].snapshot),
+                start_at, deadline,
+                warmup=lambda: http_engine.fetch_dashboard(session),
+            )
+        opened_at = time.time() + offset
+        if found is None:
+            logger.warning("No available sessions found.")
+            notify(">> No available sessions found")
+            return False
+        booked = book_http(session, *found)
+        if on_time and opened:
+            slot_history.record_opening(opened_at)
+        return booked
+    except http_engine.HttpEngineError as e:
+        logger.warning(f"HTTP engine unavailable, falling back to Selenium: {e}")
+        return None
+
+def reload_day(driver, day="tomorrow"):
+    # No retry here: release_mode.poll() already calls again on the next tick
+    driver.refresh()
+    waits.until(driver, EC.element_to_be_clickable((By.CSS_SELECTOR, f".date-btn[data-day='{day}']")), "tab_button").click()
+    waits.until(driver, lambda d: d.execute_script(slots.DAY_READY_JS, day), "tab_slots")
+    return slots.snapshot(driver)
+
+@network_log.step("release_booking")
+def run_release_selenium(driver, started):
+    if not open_tomorrow_tab(driver):
+        return False
+    offset, _ = release_mode.estimate_clock_offset(http_engine.create_session())
+    start_at, deadline, on_time = release_mode.schedule(offset, started, slot_history.window())
+    notify(">> Waiting for session release...")
+
+    with metrics.span("release_poll"):
+        snapshot, opened = release_mode.poll(lambda: reload_day(driver), release_mode.ready, start_at, deadline)
+    opened_at = time.time() + offset
+    if snapshot is None:
+        logger.warning("No available sessions found.")
+        notify(">> No available sessions found")
+        return False
+    booked = book_on_tab(driver, snapshot)
+    if on_time and opened:
+        slot_history.record_opening(opened_at)
+    return booked
+
+# =============================
+# Shadow Booking
+# =============================
+def shadow_step(name, fn, failures, span=True):
+    """Runs one step of the shadow path; a failure is recorded and returns None instead of raising."""
+    try:
+        if not span:
+            return fn()
+        with metrics.span(name):
+            return fn()
+    except Exception as e:
+        logger.error(f"Shadow step {name} failed: {e}")
+        failures.append(f"{name}: {type(e).__name__}: {getattr(e, 'msg', None) or e}")
+        return None
+
+@network_log.step("perform_booking")
+def shadow_booking(driver, failures):
+    """perform_booking() up to the click: tab, slot scan, selection and the button lookup. Never clicks."""
+    if not open_tomorrow_tab(driver):
+        failures.append("tomorrow_tab: .date-btn[data-day='tomorrow'] or its slots did not load")
+        return
+    snapshot = shadow_step("slot_scan", lambda: waits.retry(lambda: slots.snapshot(driver), "slot_scan"), failures)
+    if not snapshot:
+        if snapshot is not None:
+            failures.append("slot_scan: no .session-slot elements on the tomorrow tab")
+        return
+    # Markup drift the scan itself would not notice (quota text, booking codes, buttons)
+    failures.extend(f"markup: {issue}" for issue in slot_parser.problems(driver.page_source))
+
+    order = shadow_step("selection", lambda: candidates(snapshot), failures)
+    # Off-peak, tomorrow is usually not open yet: the highest session still exercises the lookup
+    session_id = order[0] if order else max(slot.session_id for slot in snapshot)
+    logger.info(f"Shadow run would book session {session_id} ({'open' if order else 'not open, lookup only'}).")
+
+    def find():
+        btn = slots.find_button(driver, session_id)
+        if order:
+            waits.until(driver, EC.element_to_be_clickable(btn), "slot_button", CLICK_TIMEOUT)
+        driver.execute_script("arguments[0].scrollIntoView(true);", btn)
+        return btn
+    shadow_step("find_button", find, failures)
+    debug_capture(driver, "06_shadow_button_found")
+
+def run_shadow():
+    """The Selenium booking path, timed step by step, stopping before the irreversible click."""
+    failures = []
+    driver = None
+    try:
+        driver = shadow_step("create_driver", create_driver, failures, span=False)  # Already timed
+        if driver is not None:
+            if shadow_step("login", lambda: login(driver), failures, span=False):
+                shadow_booking(driver, failures)
+            elif not any(f.startswith("login") for f in failures):
+                failures.append("login: dashboard or .membership-status not reached")
+    finally:
+        if driver:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.error(f"Error closing driver: {e}")
+
+    phases = metrics.current_run()["phases"]
+    lines = ["__**>> Shadow booking run <<**__"]
+    for step in ("create_driver", "login", "tomorrow_tab", "slot_scan", "selection", "find_button"):
+        if step in phases:
+            lines.append(f"{step} : {phases[step] * 1000:.0f} ms")
+    lines += [f"❌ {failure}" for failure in failures] or ["All selectors found"]
+    notify("\n".join(lines))
+    flight_recorder.close(bool(failures))
+    metrics.finish("shadow_broken" if failures else "shadow_ok")
+    return not failures
+
 # =============================
 # MAIN
 # =============================
-def main():
-    notify("__** Starting Process **__")
-    
+def run(started):
+    if ENGINE == "http":
+        booked = run_release_http(started) if BOOKING_MODE == "release" else run_http()
+        if booked is not None:
+            notify(">> Reservation complete" if booked else ">> Unable to reserve")
+            metrics.finish("booked" if booked else "not_booked")
+            return
+
     driver = None
+    failed = True
+    outcome = "error"
     try:
         driver = create_driver()
         if not login(driver):
             logger.error("Login failed, exiting.")
             notify("Login failed, exiting program...")
+            outcome = "login_failed"
             return
         
-        if perform_booking(driver):
+        booked = run_release_selenium(driver, started) if BOOKING_MODE == "release" else perform_booking(driver)
+        outcome = "booked" if booked else "not_booked"
+        if booked:
+            failed = False
             notify(">> Reservation complete")
         else:
             notify(">> Unable to reserve")
@@ -242,6 +537,32 @@ def main():
                 logger.info("Driver closed.")
             except Exception as e:
                 logger.error(f"Error closing driver: {e}")
+        flight_recorder.close(failed)
+        metrics.finish(outcome)
+
+def main():
+    notify("__** Starting Process **__")
+    started = time.time()
+    # Shadow runs get their own entry so their timings never mix with real bookings in metrics.py
+    metrics.start_run("shadow" if BOOKING_MODE == "shadow" else "main", engine=ENGINE, mode=BOOKING_MODE)
+    waits.run_deadline = started + release_mode.MAX_RUNTIME  # No retry outlives the run
+
+    if BOOKING_MODE == "shadow":
+        # Books nothing, so it needs no lease; a broken path fails the process for the workflow
+        if not run_shadow():
+            raise SystemExit(1)
+        return
+
+    # Overlapping invocations for the same member and day: one books, the others join or leave
+    with lease.hold(GYM_CODE, "tomorrow", "main") as owned:
+        if not owned:
+            notify(">> Another run is still booking tomorrow, exiting")
+            metrics.finish("busy")
+            return
+        if already_booked(GYM_CODE):
+            metrics.finish("ledger")
+            return
+        run(started)
 
 if __name__ == "__main__":
     main()
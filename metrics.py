@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import math
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from collections import defaultdict
+import session_cache
+
+# Constants
+RUN_LOG = os.getenv("RUN_LOG", os.path.join(session_cache.CACHE_DIR, "run_metrics.jsonl"))  # One JSON line per run, cached with the bot state
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()  # Current run per thread (roster/daemon workers run side by side)
+
+# =============================
+# Runs and Spans
+# =============================
+def start_run(entry, **fields):
+    _local.run = {
+        "entry": entry,
+        "started": time.time(),
+        "phases": {},
+        "webdriver_calls": defaultdict(int),
+        "outcome": None,
+        **fields,
+    }
+    _local.stack = []
+    _local.t0 = time.perf_counter()
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+@contextmanager
+def span(name):
+    """Adds the wall time of the block to phase `name` of the current run (no-op without a run)."""
+    run = current_run()
+    if run is None:
+        yield
+        return
+    _local.stack.append(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        run["phases"][name] = run["phases"].get(name, 0.0) + time.perf_counter() - t0
+        _local.stack.pop()
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def record(name, seconds):
+    """Records a phase measured elsewhere (e.g. click-to-confirm latency)."""
+    run = current_run()
+    if run is not None:
+        run["phases"][name] = run["phases"].get(name, 0.0) + seconds
+
+
+def instrument(driver):
+    """Counts WebDriver commands, attributed to the innermost open span."""
+    execute = driver.execute
+
+    def counted(driver_command, params=None):
+        run = current_run()
+        if run is not None:
+            stack = getattr(_local, "stack", [])
+            run["webdriver_calls"][stack[-1] if stack else "other"] += 1
+        return execute(driver_command, params)
+
+    driver.execute = counted
+    return driver
+
+
+def finish(outcome):
+    """Appends the current run to RUN_LOG and clears it."""
+    run = current_run()
+    if run is None:
+        return
+    _local.run = None
+    run["outcome"] = outcome
+    run["phases"]["total"] = time.perf_counter() - _local.t0
+    run["phases"] = {k: round(v, 4) for k, v in run["phases"].items()}
+    run["webdriver_calls"] = dict(run["webdriver_calls"])
+    run["webdriver_calls_total"] = sum(run["webdriver_calls"].values())
+    try:
+        os.makedirs(os.path.dirname(RUN_LOG) or ".", exist_ok=True)
+        with open(RUN_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+    except OSError as e:
+        logger.warning(f"Could not write run metrics: {e}")
+    logger.info(f"Run metrics: {run['phases']} ({run['webdriver_calls_total']} WebDriver calls, {outcome})")
+
+# =============================
+# Summary
+# =============================
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(path=RUN_LOG):
+    """p50/p95 per (entry, phase) across every run in the log."""
+    phases = defaultdict(list)
+    calls = defaultdict(list)
+    outcomes = defaultdict(lambda: defaultdict(int))
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+                entry = run["entry"]
+            except (ValueError, KeyError, TypeError):
+                continue  # Not a run record
+            for name, seconds in run.get("phases", {}).items():
+                phases[(entry, name)].append(seconds)
+            calls[entry].append(run.get("webdriver_calls_total", 0))
+            outcomes[entry][run.get("outcome")] += 1
+
+    lines = [f"{'entry':20} {'phase':22} {'runs':>5} {'p50':>9} {'p95':>9}"]
+    for (entry, name), values in sorted(phases.items()):
+        lines.append(f"{entry:20} {name:22} {len(values):>5} {percentile(values, 50):>8.3f}s {percentile(values, 95):>8.3f}s")
+    for entry, values in sorted(calls.items()):
+        lines.append(f"{entry:20} {'webdriver_calls':22} {len(values):>5} {percentile(values, 50):>9} {percentile(values, 95):>9}")
+    for entry, counts in sorted(outcomes.items()):
+        lines.append(f"{entry:20} outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items(), key=str)))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python metrics.py [run_metrics.jsonl]
+    print(summarize(sys.argv[1] if len(sys.argv) > 1 else RUN_LOG))
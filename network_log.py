@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import logging
+import functools
+from datetime import datetime, timezone
+import metrics
+
+# Opt-in browser-side network timing. With NETWORK_LOG=1, create_driver() turns on
+# Chrome's performance log, and every step decorated with @network_log.step() drains it
+# into a HAR-style record under NETWORK_LOG_DIR plus a slowest-requests summary.
+
+# Constants
+NETWORK_LOG = os.getenv("NETWORK_LOG", "0").lower() in ("1", "true", "yes", "on")
+NETWORK_LOG_DIR = os.getenv("NETWORK_LOG_DIR", "network_logs")
+NETWORK_LOG_TOP = 5  # Slowest requests listed per step
+SERVER_TYPES = {"Document", "XHR", "Fetch"}  # Requests whose wait is the site thinking, not an asset
+EVENTS = {"Network.requestWillBeSent", "Network.responseReceived", "Network.loadingFinished", "Network.loadingFailed"}
+
+logger = logging.getLogger(__name__)
+
+
+# =============================
+# Collection
+# =============================
+def _state(driver):
+    state = getattr(driver, "_network_log", None)
+    if state is None:
+        run = metrics.current_run() or {}
+        started = datetime.now(timezone.utc)
+        state = {
+            "file": os.path.join(NETWORK_LOG_DIR, f"{run.get('entry', 'run')}-{started:%Y%m%d-%H%M%S}-{id(driver) % 10000:04d}.har.json"),
+            "requests": {},  # CDP requestId -> entry being built
+            "pages": [],
+            "broken": False,
+        }
+        driver._network_log = state
+    return state
+
+
+def drain(driver, step):
+    """Moves pending performance-log events into the driver's record; new requests are tagged with `step`."""
+    state = _state(driver)
+    if state["broken"]:
+        return state
+    try:
+        raw = driver.get_log("performance")
+    except Exception as e:
+        logger.warning(f"Network log unavailable, turning it off for this browser: {e}")
+        state["broken"] = True
+        return state
+    requests = state["requests"]
+    for item in raw:
+        try:
+            message = json.loads(item["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method")
+        if method not in EVENTS:
+            continue
+        params = message.get("params", {})
+        rid = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if rid in requests and params.get("redirectResponse"):
+                # Same requestId after a redirect: keep the finished hop as its own entry
+                hop = requests.pop(rid)
+                hop["status"] = params["redirectResponse"].get("status")
+                hop["timing"] = params["redirectResponse"].get("timing")
+                hop["end"] = params.get("timestamp")
+                requests[f"{rid}:{len(requests)}"] = hop
+            requests[rid] = {
+                "step": step,
+                "method": params["request"]["method"],
+                "url": params["request"]["url"],
+                "type": params.get("type", "Other"),
+                "wall": params.get("wallTime"),
+                "start": params.get("timestamp"),
+                "end": None,
+                "status": None,
+                "timing": None,
+                "bytes": 0,
+                "cached": False,
+                "error": None,
+            }
+            continue
+        entry = requests.get(rid)
+        if entry is None:
+            continue
+        if method == "Network.responseReceived":
+            response = params.get("response", {})
+            entry["status"] = response.get("status")
+            entry["mime"] = response.get("mimeType", "")
+            entry["timing"] = response.get("timing")
+            entry["cached"] = bool(response.get("fromDiskCache") or response.get("fromServiceWorker"))
+        else:
+            entry["end"] = params.get("timestamp")
+            if method == "Network.loadingFinished":
+                entry["bytes"] = int(params.get("encodedDataLength") or 0)
+            else:
+                entry["error"] = params.get("errorText") or "failed"
+    return state
+
+
+def timings(entry):
+    """HAR timings in ms (blocked, dns, connect, ssl, send, wait, receive); -1 where not applicable."""
+    t = entry.get("timing")
+    total = (entry["end"] - entry["start"]) * 1000 if entry["end"] and entry["start"] else -1
+    if not t:
+        return {"blocked": -1, "dns": -1, "connect": -1, "ssl": -1, "send": -1, "wait": -1, "receive": -1}, total
+
+    def span(a, b):
+        return round(t[b] - t[a], 2) if t.get(a, -1) >= 0 and t.get(b, -1) >= 0 else -1
+
+    headers_at = t["requestTime"] + t.get("receiveHeadersEnd", 0) / 1000
+    firsts = [t[k] for k in ("dnsStart", "connectStart", "sendStart") if t.get(k, -1) >= 0]
+    result = {
+        "blocked": round((t["requestTime"] - entry["start"]) * 1000 + (min(firsts) if firsts else 0), 2),
+        "dns": span("dnsStart", "dnsEnd"),
+        "connect": span("connectStart", "connectEnd"),
+        "ssl": span("sslStart", "sslEnd"),
+        "send": span("sendStart", "sendEnd"),
+        "wait": span("sendEnd", "receiveHeadersEnd"),
+        "receive": round((entry["end"] - headers_at) * 1000, 2) if entry["end"] else -1,
+    }
+    return result, total
+
+# =============================
+# HAR Record
+# =============================
+def har(state):
+    entries = []
+    for entry in state["requests"].values():
+        phases, total = timings(entry)
+        entries.append({
+            "pageref": entry["step"] or "other",
+            "startedDateTime": datetime.fromtimestamp(entry["wall"] or 0, tz=timezone.utc).isoformat(),
+            "time": round(total, 2),
+            "request": {"method": entry["method"], "url": entry["url"]},
+            "response": {"status": entry["status"] or 0, "content": {"mimeType": entry.get("mime", ""), "size": entry["bytes"]}},
+            "timings": phases,
+            "_resourceType": entry["type"],
+            "_fromCache": entry["cached"],
+            "_error": entry["error"],
+        })
+    entries.sort(key=lambda e: e["startedDateTime"])
+    return {"log": {"version": "1.2", "creator": {"name": "performancelab-bot", "version": "1"},
+                    "pages": state["pages"], "entries": entries}}
+
+
+def _busy(entries, since, until):
+    """Seconds inside [since, until] with at least one request in flight."""
+    spans = sorted(
+        (max(since, e["wall"]), min(until, e["wall"] + (e["end"] - e["start"])))
+        for e in entries if e["wall"] and e["end"] and e["start"]
+    )
+    busy, edge = 0.0, since
+    for start, end in spans:
+        start = max(start, edge)
+        if end > start:
+            busy += end - start
+            edge = end
+    return busy
+
+
+def summarize(state, step, since, until):
+    """Logs the step's slowest requests and how its wall time splits into network vs our own work."""
+    entries = [e for e in state["requests"].values() if e["step"] == step]
+    wall = until - since
+    network = _busy(entries, since, until)
+    server_wait = sum(
+        max(0.0, timings(e)[0]["wait"]) / 1000 for e in entries if e["type"] in SERVER_TYPES and not e["cached"]
+    )
+    metrics.record(f"{step}_network", network)
+    metrics.record(f"{step}_server_wait", server_wait)
+    lines = [f"Network during {step}: {len(entries)} requests, {sum(e['bytes'] for e in entries) / 1024:.0f} KiB, "
+             f"network busy {network:.2f}s of {wall:.2f}s (own overhead {max(0.0, wall - network):.2f}s), "
+             f"server wait {server_wait:.2f}s"]
+    slowest = sorted(entries, key=lambda e: timings(e)[1], reverse=True)[:NETWORK_LOG_TOP]
+    for e in slowest:
+        phases, total = timings(e)
+        status = e["error"] or e["status"] or "-"
+        lines.append(f"  {total:7.0f} ms  wait {phases['wait']:6.0f} ms  {status}  {e['type']:<10} {e['method']} {e['url'][:100]}")
+    logger.info("\n".join(lines))
+
+
+def write(state):
+    try:
+        os.makedirs(NETWORK_LOG_DIR, exist_ok=True)
+        with open(state["file"], "w", encoding="utf-8") as f:
+            json.dump(har(state), f, indent=1)
+    except OSError as e:
+        logger.warning(f"Could not write network log: {e}")
+
+# =============================
+# Steps
+# =============================
+def step(name):
+    """Decorator for functions taking the driver first: attributes the requests they make to `name`."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(driver, *args, **kwargs):
+            if not NETWORK_LOG:
+                return fn(driver, *args, **kwargs)
+            drain(driver, None)  # Whatever ran before belongs to no step
+            since = time.time()
+            try:
+                return fn(driver, *args, **kwargs)
+            finally:
+                until = time.time()
+                state = drain(driver, name)
+                if not state["broken"]:
+                    state["pages"].append({
+                        "id": name,
+                        "title": name,
+                        "startedDateTime": datetime.fromtimestamp(since, tz=timezone.utc).isoformat(),
+                        "pageTimings": {"onLoad": round((until - since) * 1000, 2)},
+                    })
+                    summarize(state, name, since, until)
+                    write(state)
+        return inner
+    return wrap
@@ -1,11 +1,28 @@
 import os
+import time
+import queue
+import atexit
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 
 WEBHOOK = os.getenv("DISCORD_WEBHOOK")
+COALESCE_WINDOW = float(os.getenv("NOTIFY_COALESCE", "0.5"))  # Detik untuk menggabungkan pesan beruntun
+FLUSH_TIMEOUT = float(os.getenv("NOTIFY_FLUSH_TIMEOUT", "10"))  # Detik menunggu antrian saat exit
+MAX_CONTENT = 2000  # Batas panjang pesan Discord
+MAX_ATTEMPTS = 4
+
+_queue = queue.Queue()
+_lock = threading.Lock()
+_worker = None
+_session = None
+
 
 def send_log(message: str):
     """
     Mengirim log ke Discord via Webhook.
+    Pesan dimasukkan ke antrian dan dikirim oleh worker di background,
+    jadi pemanggil tidak pernah menunggu Discord.
     Jika DISCORD_WEBHOOK tidak di-set, fungsi tetap jalan tanpa error.
     """
 
@@ -13,13 +30,100 @@ def send_log(message: str):
         print("[WARN] DISCORD_WEBHOOK tidak ditemukan, skip notifikasi.", flush=True)
         return
 
+    _start_worker()
+    _queue.put(message)
+
+
+def flush(timeout: float = FLUSH_TIMEOUT):
+    """
+    Menunggu sampai semua pesan di antrian terkirim (maksimal `timeout` detik).
+    """
+
+    deadline = time.monotonic() + timeout
+    with _queue.all_tasks_done:
+        while _queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"[WARN] {_queue.unfinished_tasks} notifikasi belum terkirim saat exit.", flush=True)
+                return
+            _queue.all_tasks_done.wait(remaining)
+
+
+def _start_worker():
+    global _worker, _session
+    with _lock:
+        if _worker is not None:
+            return
+        # Satu koneksi keep-alive dipakai ulang untuk semua pesan
+        _session = requests.Session()
+        _session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        _worker = threading.Thread(target=_run, name="discord-notify", daemon=True)
+        _worker.start()
+        atexit.register(flush)
+
+
+def _run():
+    while True:
+        batch = [_queue.get()]
+        # Kumpulkan pesan yang datang beruntun menjadi satu kiriman
+        deadline = time.monotonic() + COALESCE_WINDOW
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            for content in _chunks(batch):
+                _post(content)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _chunks(messages):
+    content = ""
+    for message in messages:
+        while len(message) > MAX_CONTENT:
+            if content:
+                yield content
+                content = ""
+            yield message[:MAX_CONTENT]
+            message = message[MAX_CONTENT:]
+        if content and len(content) + 1 + len(message) > MAX_CONTENT:
+            yield content
+            content = ""
+        content = f"{content}\n{message}" if content else message
+    if content:
+        yield content
+
+
+def _post(content):
     payload = {
-        "content": message
+        "content": content
     }
 
-    try:
-        r = requests.post(WEBHOOK, json=payload, timeout=5)
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            r = _session.post(WEBHOOK, json=payload, timeout=5)
+        except Exception as e:
+            print(f"[WARN] Gagal mengirim ke Discord: {e}", flush=True)
+            return
+
+        if r.status_code == 429:
+            # Discord memberi tahu berapa lama harus menunggu
+            try:
+                retry_after = float(r.json().get("retry_after", 1))
+            except ValueError:
+                retry_after = float(r.headers.get("Retry-After", 1))
+            time.sleep(retry_after)
+            continue
+
         if r.status_code != 204 and r.status_code != 200:
             print(f"[WARN] Discord response: {r.status_code} {r.text}", flush=True)
-    except Exception as e:
-        print(f"[WARN] Gagal mengirim ke Discord: {e}", flush=True)
+        return
+
+    print("[WARN] Discord rate limit, pesan dibuang.", flush=True)
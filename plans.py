@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import logging
+import threading
+import traceback
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+import http_engine
+import session_cache
+import slots
+import waits
+import ledger
+import lease
+import metrics
+import roster
+import slot_history
+import main as booking
+
+# Constants
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+BOOKING_PLAN = os.getenv("BOOKING_PLAN", "")  # Plan for GYM_CODE, e.g. {"mon": [6, 5], "thu": [4], "sat": []}
+
+logger = logging.getLogger(__name__)
+
+_browsers = threading.Semaphore(roster.ROSTER_BROWSERS)
+
+# =============================
+# Plans
+# =============================
+def parse_plan(raw):
+    """{"mon": [6, 5], "Thursday": []} -> {0: [6, 5], 3: []}; an empty list takes any session."""
+    plan = {}
+    for key, sessions in raw.items():
+        weekday = key.strip().lower()[:3]
+        if weekday not in WEEKDAYS:
+            raise ValueError(f"Unknown weekday in booking plan: {key!r}")
+        plan[WEEKDAYS.index(weekday)] = [int(s) for s in sessions or []]
+    return plan
+
+
+def load_plans():
+    """Members with a weekly plan: GYM_CODE from BOOKING_PLAN, plus every roster member with a "plan".
+
+    Roster format: {"members": [{"code": "...", "name": "...", "plan": {"mon": [6, 5], "wed": [4]}}]}
+    """
+    members = []
+    if BOOKING_PLAN and booking.GYM_CODE:
+        members.append({"code": booking.GYM_CODE, "name": booking.GYM_NAME, "plan": parse_plan(json.loads(BOOKING_PLAN))})
+    try:
+        listed = roster.load_roster()
+    except FileNotFoundError:
+        # No roster is a normal setup, not an error; an unreadable or malformed one still raises
+        logger.info(f"No roster file at {roster.ROSTER_FILE}, only BOOKING_PLAN applies.")
+        listed = []
+    for member in listed:
+        if member.get("plan") and member["code"] not in {m["code"] for m in members}:
+            members.append(dict(member, plan=parse_plan(member["plan"])))
+    return members
+
+
+def due(plan, days, at=None):
+    """(day, sessions) for every data-day tab whose weekday the plan covers, in tab order."""
+    result = []
+    for day in days:
+        try:
+            weekday = date.fromisoformat(ledger.day_date(day, at)).weekday()
+        except ValueError:
+            logger.warning(f"Cannot tell the date of tab {day!r}, skipping it.")
+            continue
+        if weekday in plan:
+            result.append((day, plan[weekday]))
+    return result
+
+# =============================
+# Per-member Runs
+# =============================
+def joined(code, day, owned):
+    """Status when another invocation has (or is) booking the day; None when this run should book it."""
+    if not owned:
+        return "busy elsewhere"
+    if ledger.fresh(ledger.lookup(code, day)):
+        return "already reserved"  # Booked by the run that held the lease before us
+    return None
+
+
+def run_member_http(member):
+    """Books every due day over one HTTP login. Raises HttpEngineError to fall back."""
+    session = http_engine.create_session()
+    session_cache.login_http(session, member["code"], member["name"])
+    pages = http_engine.fetch_days(session)  # Every tab in one concurrent scan
+    ledger.sync(member["code"], {day: page.snapshot for day, (_, page) in pages.items()})
+
+    results = {}
+    for day, sessions in due(member["plan"], pages):
+        page_url, page = pages[day]
+        if any(slot.reserved for slot in page.snapshot):
+            results[day] = "already reserved"
+            continue
+        with lease.hold(member["code"], day, "plans") as owned:
+            results[day] = joined(member["code"], day, owned)
+            if results[day] is None:
+                booked = booking.book_http(session, page_url, page, sessions or None, member["code"], day)
+                results[day] = "booked" if booked else "no slot"
+    return results
+
+
+def run_member_selenium(member):
+    with _browsers:
+        driver = booking.create_driver(member["code"])
+        try:
+            if not booking.login(driver, member["code"], member["name"]):
+                return {"*": "login failed"}
+            days = [tab["day"] for tab in driver.execute_script(slots.DAY_TABS_JS) or []]
+            results = {}
+            for day, sessions in due(member["plan"], days):
+                if not booking.open_day_tab(driver, day):
+                    results[day] = "tab failed"
+                    continue
+                snapshot = waits.retry(lambda: slots.snapshot(driver), "slot_scan")
+                if any(slot.reserved for slot in snapshot):
+                    booking.remember(snapshot, member["code"], "page", day)
+                    results[day] = "already reserved"
+                    continue
+                with lease.hold(member["code"], day, "plans") as owned:
+                    results[day] = joined(member["code"], day, owned)
+                    if results[day] is None:
+                        ok = booking.book_on_tab(driver, snapshot, sessions or None, member["code"], day)
+                        results[day] = "booked" if ok else "no slot"
+            return results
+        finally:
+            driver.quit()
+
+
+def run_member(member):
+    threading.current_thread().name = member["name"] or "member"
+    started = time.time()
+    metrics.start_run("plan")
+    try:
+        try:
+            days = run_member_http(member)
+        except http_engine.HttpEngineError as e:
+            logger.warning(f"HTTP engine unavailable, falling back to Selenium: {e}")
+            days = run_member_selenium(member)
+    except Exception as e:
+        logger.error(f"Plan run failed: {e}")
+        traceback.print_exc()
+        days = {"*": f"error: {e}"}
+    metrics.finish("ok" if all(status in ("booked", "already reserved") for status in days.values()) else "incomplete")
+    result = {"name": member["name"], "code": member["code"], "days": days, "elapsed": time.time() - started}
+    logger.info(f"Plan result: {days} in {result['elapsed']:.2f}s")
+    return result
+
+# =============================
+# Report
+# =============================
+def format_report(results):
+    lines = ["__**>> Booking plan report <<**__"]
+    for result in results:
+        if not result["days"]:
+            lines.append(f"{result['name']} : nothing due [{result['elapsed']:.1f}s]")
+            continue
+        parts = []
+        for day, status in result["days"].items():
+            entry = ledger.lookup(result["code"], day) if day != "*" else None
+            detail = f" (session {entry['session_id']})" if entry and status in ("booked", "already reserved") else ""
+            parts.append(f"{day} {status}{detail}")
+        lines.append(f"{result['name']} : " + ", ".join(parts) + f" [{result['elapsed']:.1f}s]")
+    return "\n".join(lines)
+
+# =============================
+# MAIN
+# =============================
+def main():
+    started = time.time()
+    try:
+        members = load_plans()
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not load booking plans: {e}")
+        booking.notify(f"🔥 Booking plan error: {e}")
+        return
+    if not members:
+        logger.info("No booking plans configured.")
+        return
+
+    booking.notify(f"__** Running booking plans for {len(members)} members **__")
+    slot_history.load()  # Once for every worker, before any of them reaches a booking click
+    with ThreadPoolExecutor(max_workers=max(1, min(roster.ROSTER_WORKERS, len(members)))) as pool:
+        results = list(pool.map(run_member, members))
+
+    booking.notify(format_report(results))
+    logger.info(f"Booking plans done in {time.time() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import os
+import time
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import http_engine
+
+# Constants
+RELEASE_TIME = os.getenv("RELEASE_TIME", "17:30:00")  # UTC, server clock
+RELEASE_EARLY = float(os.getenv("RELEASE_EARLY", "2"))  # Seconds before release to start polling
+RELEASE_WINDOW = float(os.getenv("RELEASE_WINDOW", "30"))  # Seconds after release to keep polling
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "0.15"))  # Seconds between polls inside the window
+WARMUP_LEAD = 3  # Seconds before polling to re-open the connection
+MAX_RUNTIME = int(os.getenv("MAX_RUNTIME", "300"))  # Seconds for the whole run
+CLOCK_SAMPLES = 8
+CLOCK_SPACING = 0.37  # Off the 1 s grid so samples straddle a Date tick
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# Server Clock
+# =============================
+def estimate_clock_offset(session, url=http_engine.WEB_URL, samples=CLOCK_SAMPLES):
+    """Server-minus-local clock offset in seconds, from HTTP Date headers. Returns (offset, error)."""
+    # Date has 1 s resolution: the server stamped it between send and receive,
+    # so each sample bounds offset to [date - t1, date + 1 - t0]. Intersect them.
+    low, high = float("-inf"), float("inf")
+    for i in range(samples):
+        if i:
+            time.sleep(CLOCK_SPACING)
+        t0 = time.time()
+        try:
+            resp = session.head(url, timeout=http_engine.HTTP_TIMEOUT, allow_redirects=False)
+        except Exception as e:
+            logger.warning(f"Clock sample failed: {e}")
+            continue
+        t1 = time.time()
+        date = resp.headers.get("Date")
+        if not date:
+            continue
+        server = parsedate_to_datetime(date).timestamp()
+        low = max(low, server - t1)
+        high = min(high, server + 1 - t0)
+
+    if low == float("-inf") or low > high:
+        # No usable Date header, or servers behind a balancer disagree
+        logger.warning("Could not estimate server clock offset, assuming 0.")
+        return 0.0, None
+    offset, error = (low + high) / 2, (high - low) / 2
+    logger.info(f"Server clock offset {offset:+.3f}s (±{error:.3f}s)")
+    return offset, error
+
+
+def release_epoch(offset, now=None):
+    """Local epoch time of today's RELEASE_TIME on the server clock."""
+    server_now = (now or time.time()) + offset
+    day = datetime.fromtimestamp(server_now, tz=timezone.utc)
+    hour, minute, second = (int(part) for part in RELEASE_TIME.split(":"))
+    release = day.replace(hour=hour, minute=minute, second=second, microsecond=0)
+    return release.timestamp() - offset
+
+# =============================
+# Waiting / Polling
+# =============================
+def sleep_until(target):
+    # Coarse sleep, then short naps for the last few milliseconds
+    while True:
+        remaining = target - time.time()
+        if remaining <= 0:
+            return
+        time.sleep(remaining - 0.02 if remaining > 0.05 else 0.001)
+
+
+def schedule(offset, started, window=None):
+    """Returns (poll_start, deadline, on_time) in local epoch seconds for this run.
+
+    window: (seconds before, seconds after) release to poll, e.g. learned by
+    slot_history; defaults to RELEASE_EARLY / RELEASE_WINDOW. on_time is False
+    when the release cannot be waited for and polling starts immediately.
+    """
+    early, late = window or (RELEASE_EARLY, RELEASE_WINDOW)
+    release = release_epoch(offset)
+    budget_end = started + MAX_RUNTIME
+    if time.time() > release + late:
+        logger.warning("Release window already passed, polling immediately.")
+        return time.time(), min(time.time() + late, budget_end), False
+    if release - early > budget_end:
+        logger.warning(f"Release is beyond MAX_RUNTIME={MAX_RUNTIME}s, polling immediately.")
+        return time.time(), budget_end, False
+    logger.info(f"Release {RELEASE_TIME} UTC in {release - time.time():.1f}s, "
+                f"polling from {-early:+.2f}s to +{late}s.")
+    return release - early, min(release + late, budget_end), True
+
+
+def poll(fetch, ready, start_at, deadline, warmup=None):
+    """Calls fetch() every POLL_INTERVAL from start_at until ready(result) or deadline.
+
+    Returns (result, opened): the first ready result, or None, and whether an
+    earlier poll saw the slots still closed, i.e. the opening happened while
+    polling. fetch() errors are retried; at least one fetch is always made.
+    """
+    if warmup is not None and start_at - WARMUP_LEAD > time.time():
+        sleep_until(start_at - WARMUP_LEAD)
+        try:
+            warmup()
+        except Exception as e:
+            logger.warning(f"Warm-up before release failed: {e}")
+    sleep_until(start_at)
+
+    attempts = 0
+    closed = False
+    while True:
+        attempts += 1
+        tick = time.time()
+        try:
+            result = fetch()
+            if ready(result):
+                logger.info(f"Slots ready after {attempts} polls.")
+                return result, closed
+            closed = True
+        except Exception as e:
+            logger.warning(f"Poll {attempts} failed: {e}")
+        if time.time() >= deadline:
+            logger.warning(f"No bookable slot after {attempts} polls.")
+            return None, closed
+        sleep_until(min(tick + POLL_INTERVAL, deadline))
+
+
+def ready(snapshot):
+    """A tomorrow snapshot is worth acting on once a slot is open or already ours."""
+    return any(slot.available or slot.reserved for slot in snapshot)
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import http_engine
+import session_cache
+import release_mode
+import slot_history
+import main as booking
+import metrics
+import ledger
+import lease
+
+# Constants
+ROSTER_FILE = os.getenv("ROSTER_FILE", "roster.json")
+ROSTER_WORKERS = int(os.getenv("ROSTER_WORKERS", "20"))  # Members booked at the same time
+ROSTER_BROWSERS = int(os.getenv("ROSTER_BROWSERS", "2"))  # Chrome instances for Selenium fallbacks
+BOOKING_MODE = os.getenv("BOOKING_MODE", "now").lower()
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s', force=True)  # main.py configured it on import
+logger = logging.getLogger(__name__)
+
+_browsers = threading.Semaphore(ROSTER_BROWSERS)
+
+# =============================
+# Roster
+# =============================
+def load_roster():
+    """Members from ROSTER_JSON (e.g. a secret) or ROSTER_FILE.
+
+    Format: {"members": [{"code": "...", "name": "...", "sessions": [6, 5, 4]}]}
+    """
+    raw = os.getenv("ROSTER_JSON")
+    if not raw:
+        with open(ROSTER_FILE, encoding="utf-8") as f:
+            raw = f.read()
+    members = json.loads(raw)["members"]
+    for member in members:
+        member["sessions"] = [int(s) for s in member.get("sessions") or []]
+    return members
+
+# =============================
+# Per-member Workers
+# =============================
+def book_member_http(member, window):
+    """Books one member over HTTP and returns a result dict. Raises HttpEngineError to fall back."""
+    session = http_engine.create_session()
+    session_cache.login_http(session, member["code"], member["name"])
+    page_url, page = http_engine.fetch_day(session, "tomorrow")
+
+    if window is not None:
+        start_at, deadline, _ = window
+        found, _ = release_mode.poll(
+            lambda: http_engine.fetch_day(session, "tomorrow"),
+            lambda result: release_mode.ready(result[1].snapshot),
+            start_at, deadline,
+            warmup=lambda: http_engine.fetch_dashboard(session),
+        )
+        if found is None:
+            return {"status": "no slot"}
+        page_url, page = found
+
+    reserved = next((slot for slot in page.snapshot if slot.reserved), None)
+    if reserved is not None:
+        ledger.record(member["code"], "tomorrow", reserved.session_id, reserved.booking_code, "page")
+        return {"status": "already reserved", "session_id": reserved.session_id, "code": reserved.booking_code}
+
+    for session_id in booking.candidates(page.snapshot, member["sessions"]):
+        booked = http_engine.book_and_verify(session, page_url, page, session_id)
+        if booked is not None:
+            ledger.record(member["code"], "tomorrow", session_id, booked.booking_code)
+            return {"status": "booked", "session_id": session_id, "code": booked.booking_code}
+        # Lost the race for this one; re-read before trying the next preference
+        page_url, page = http_engine.fetch_day(session, "tomorrow")
+    return {"status": "no slot"}
+
+
+def book_member_selenium(member, window):
+    with _browsers:
+        driver = booking.create_driver(member["code"])
+        try:
+            if not booking.login(driver, member["code"], member["name"]):
+                return {"status": "login failed"}
+            if window is None:
+                ok = booking.perform_booking(driver, preferences=member["sessions"], code=member["code"])
+                return {"status": "booked" if ok else "no slot"}
+
+            if not booking.open_tomorrow_tab(driver):
+                return {"status": "tab failed"}
+            start_at, deadline, _ = window
+            snapshot, _ = release_mode.poll(lambda: booking.reload_day(driver), release_mode.ready, start_at, deadline)
+            if snapshot is None:
+                return {"status": "no slot"}
+            ok = booking.book_on_tab(driver, snapshot, member["sessions"], member["code"])
+            return {"status": "booked" if ok else "no slot"}
+        finally:
+            driver.quit()
+
+
+def book_member(member, window):
+    threading.current_thread().name = member["name"] or "member"
+    started = time.time()
+    metrics.start_run("roster", mode=BOOKING_MODE)
+    try:
+        with lease.hold(member["code"], "tomorrow", "roster") as owned:
+            entry = ledger.lookup(member["code"], "tomorrow") if owned else None
+            if not owned:
+                result = {"status": "busy elsewhere"}
+            elif ledger.fresh(entry):
+                result = {"status": "already reserved", "session_id": entry["session_id"], "code": entry["booking_code"]}
+            else:
+                try:
+                    result = book_member_http(member, window)
+                except http_engine.HttpEngineError as e:
+                    logger.warning(f"HTTP engine unavailable, falling back to Selenium: {e}")
+                    result = book_member_selenium(member, window)
+    except Exception as e:
+        logger.error(f"Booking failed: {e}")
+        traceback.print_exc()
+        result = {"status": f"error: {e}"}
+    metrics.finish(result["status"].split(":")[0].replace(" ", "_"))
+    result["name"] = member["name"]
+    result["elapsed"] = time.time() - started
+    logger.info(f"Result: {result['status']} in {result['elapsed']:.2f}s")
+    return result
+
+# =============================
+# Report
+# =============================
+def format_report(results):
+    lines = ["__**>> Roster booking report <<**__"]
+    for result in results:
+        line = f"{result['name']} : {result['status']}"
+        if result.get("session_id"):
+            line += f" (session {result['session_id']}"
+            line += f", {result['code']})" if result.get("code") else ")"
+        lines.append(f"{line} [{result['elapsed']:.1f}s]")
+    booked = sum(1 for r in results if r["status"] in ("booked", "already reserved"))
+    lines.append(f">> {booked}/{len(results)} members reserved")
+    return "\n".join(lines)
+
+# =============================
+# MAIN
+# =============================
+def main():
+    started = time.time()
+    try:
+        members = load_roster()
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not load roster: {e}")
+        booking.notify(f"🔥 Roster error: {e}")
+        return
+
+    booking.notify(f"__** Starting roster booking for {len(members)} members **__")
+    slot_history.load()  # Once for every worker, before any of them reaches a booking click
+    window = None
+    if BOOKING_MODE == "release":
+        # One clock estimate and schedule shared by every worker
+        offset, _ = release_mode.estimate_clock_offset(http_engine.create_session())
+        window = release_mode.schedule(offset, started)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(ROSTER_WORKERS, len(members)))) as pool:
+        results = list(pool.map(lambda member: book_member(member, window), members))
+
+    booking.notify(format_report(results))
+    logger.info(f"Roster done in {time.time() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
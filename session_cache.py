@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import http_engine
+
+# Constants
+CACHE_DIR = os.getenv("BOT_CACHE_DIR", ".cache")
+SESSION_DIR = os.path.join(CACHE_DIR, "sessions")
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "3600"))  # Seconds a saved login is worth probing
+
+logger = logging.getLogger(__name__)
+
+_prefetched = {}  # code -> entry read ahead of login by prefetch()
+
+# =============================
+# On-disk Cache
+# =============================
+def _path(code):
+    # Keyed by GYM_CODE, hashed so the member code never appears in a file name
+    key = hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SESSION_DIR, f"{key}.json")
+
+
+def prefetch(code):
+    """Reads a member's entry ahead of time (e.g. while Chrome starts); the next load() uses it."""
+    _prefetched[code] = load(code)
+
+
+def load(code):
+    """Returns the cached {saved_at, membership, cookies} entry for a member, or None."""
+    if not code or SESSION_CACHE_TTL <= 0:
+        return None
+    if code in _prefetched:
+        return _prefetched.pop(code)
+    try:
+        with open(_path(code), encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    age = time.time() - entry.get("saved_at", 0)
+    if age > SESSION_CACHE_TTL:
+        logger.info(f"Cached session expired ({age:.0f}s old).")
+        invalidate(code)
+        return None
+    return entry
+
+
+def save(code, cookies, membership):
+    if not code or SESSION_CACHE_TTL <= 0:
+        return
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    entry = {"saved_at": time.time(), "membership": membership, "cookies": cookies}
+    path = _path(code)
+    tmp = f"{path}.tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not save session cache: {e}")
+
+
+def invalidate(code):
+    try:
+        os.remove(_path(code))
+    except OSError:
+        pass
+
+# =============================
+# Selenium
+# =============================
+def restore_driver(driver, code):
+    """Loads cached cookies into Chrome and probes the dashboard. True means login can be skipped."""
+    entry = load(code)
+    if entry is None:
+        return False
+    try:
+        for cookie in entry["cookies"]:
+            # CDP sets cookies without first loading a page on the site
+            params = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly") if k in cookie}
+            if cookie.get("expiry"):
+                params["expires"] = cookie["expiry"]
+            driver.execute_cdp_cmd("Network.setCookie", params)
+        driver.get(http_engine.DASHBOARD_URL)
+        if "dashboard.php" in driver.current_url and driver.find_elements("class name", "membership-status"):
+            logger.info(f"Reused cached session (last status: {entry.get('membership')}).")
+            return True
+    except Exception as e:
+        logger.warning(f"Cached session probe failed: {e}")
+    logger.info("Cached session rejected, logging in again.")
+    invalidate(code)
+    return False
+
+
+def save_driver(driver, code, membership):
+    try:
+        save(code, driver.get_cookies(), membership)
+    except Exception as e:
+        logger.warning(f"Could not read cookies from driver: {e}")
+
+# =============================
+# HTTP Engine
+# =============================
+def login_http(session, code, name):
+    """http_engine.login() that first tries cached cookies with a single dashboard GET."""
+    entry = load(code)
+    if entry is not None:
+        for cookie in entry["cookies"]:
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+        try:
+            _, page = http_engine.fetch_dashboard(session)
+            membership = http_engine.verify_dashboard(page)
+            logger.info(f"Reused cached session (last status: {entry.get('membership')}).")
+            return membership
+        except http_engine.HttpEngineError as e:
+            logger.info(f"Cached session rejected, logging in again: {e}")
+            invalidate(code)
+            session.cookies.clear()
+
+    membership = http_engine.login(session, code, name)
+    cookies = [
+        {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "secure": c.secure,
+         "httpOnly": c.has_nonstandard_attr("HttpOnly"), "expiry": c.expires}
+        for c in session.cookies
+    ]
+    save(code, cookies, membership)
+    return membership
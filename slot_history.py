@@ -0,0 +1,211 @@
+import os
+import time
+import sqlite3
+import logging
+import statistics
+from contextlib import contextmanager
+from collections import defaultdict
+import session_cache
+import release_mode
+
+# Constants
+HISTORY_DB = os.getenv("SLOT_HISTORY_DB", os.path.join(session_cache.CACHE_DIR, "slot_history.sqlite3"))
+HISTORY_MIN_DAYS = int(os.getenv("SLOT_HISTORY_MIN_DAYS", "3"))  # Release days needed before history steers anything
+HISTORY_LOOKBACK = int(os.getenv("SLOT_HISTORY_LOOKBACK", "42"))  # Days of history used for profiles
+WINDOW_MARGIN = 1.0  # Seconds of polling kept on either side of observed openings
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    cycle INTEGER NOT NULL,        -- epoch of the release that opened these slots
+    session_id INTEGER NOT NULL,
+    observed_at REAL NOT NULL,     -- first sighting of this quota/state
+    last_seen REAL NOT NULL,       -- latest sighting with nothing changed
+    used INTEGER,
+    total INTEGER,
+    state TEXT NOT NULL,
+    PRIMARY KEY (cycle, session_id, observed_at)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS openings (
+    cycle INTEGER PRIMARY KEY,
+    opened_after REAL NOT NULL     -- seconds after the scheduled release the first ready poll landed
+);
+"""
+
+logger = logging.getLogger(__name__)
+
+_profile = None  # Loaded once per process; see load()
+
+# =============================
+# Storage
+# =============================
+@contextmanager
+def connect():
+    """One short-lived connection per call; committed and closed on exit."""
+    os.makedirs(os.path.dirname(HISTORY_DB) or ".", exist_ok=True)
+    conn = sqlite3.connect(HISTORY_DB, timeout=5)
+    try:
+        with conn:
+            conn.executescript(SCHEMA)
+            yield conn
+    finally:
+        conn.close()
+
+
+def release_cycle(at, day="tomorrow"):
+    """Epoch of the release that opened `day`'s slots, as seen at `at`."""
+    release = release_mode.release_epoch(0.0, at)
+    if release > at:
+        release -= DAY
+    return int(release - DAY if day == "today" else release)
+
+
+def record(day, snapshot, observed_at=None):
+    """Stores a day tab's slots; unchanged sessions only extend their latest row's last_seen."""
+    if day not in ("today", "tomorrow") or not snapshot:
+        return
+    observed_at = observed_at or time.time()
+    cycle = release_cycle(observed_at, day)
+    try:
+        with connect() as conn:
+            latest = {
+                session_id: (first_seen, used, state)
+                for session_id, first_seen, used, state in conn.execute(
+                    "SELECT session_id, observed_at, used, state FROM observations o WHERE cycle = ? AND observed_at = "
+                    "(SELECT MAX(observed_at) FROM observations WHERE cycle = o.cycle AND session_id = o.session_id)",
+                    (cycle,),
+                )
+            }
+            for slot in snapshot:
+                if slot.state == "reserved":
+                    continue  # Our own booking says nothing about demand
+                first_seen, used, state = latest.get(slot.session_id, (None, None, None))
+                if (used, state) == (slot.used, slot.state):
+                    conn.execute(
+                        "UPDATE observations SET last_seen = MAX(last_seen, ?) WHERE cycle = ? AND session_id = ? AND observed_at = ?",
+                        (observed_at, cycle, slot.session_id, first_seen),
+                    )
+                else:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (cycle, slot.session_id, observed_at, observed_at, slot.used, slot.total, slot.state),
+                    )
+    except sqlite3.Error as e:
+        logger.warning(f"Could not record slot history: {e}")
+
+
+def record_opening(opened_at):
+    """Stores when tomorrow's slots first showed up open in a release poll."""
+    release = release_mode.release_epoch(0.0, opened_at)
+    release = min((release - DAY, release, release + DAY), key=lambda r: abs(opened_at - r))
+    try:
+        with connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO openings VALUES (?, ?)", (int(release), opened_at - release))
+    except sqlite3.Error as e:
+        logger.warning(f"Could not record release opening: {e}")
+
+# =============================
+# Profiles
+# =============================
+def fill_times(rows):
+    """Per (cycle, session): (seconds after release it filled, or None, last seconds seen open)."""
+    by_slot = defaultdict(list)
+    for cycle, session_id, observed_at, last_seen, state in rows:
+        by_slot[(cycle, session_id)].append((observed_at - cycle, last_seen - cycle, state))
+
+    result = defaultdict(list)
+    for (cycle, session_id), seen in by_slot.items():
+        last_open, filled = None, None
+        for since, until, state in sorted(seen):
+            if state == "available":
+                last_open = until
+            elif state == "full":
+                # It filled somewhere between the last open sighting and this one
+                filled = since if last_open is None else (last_open + since) / 2
+                break
+        if filled is not None or last_open is not None:
+            result[session_id].append((filled, last_open))
+    return result
+
+
+def load():
+    """Fill-time profile per session and the observed release openings (cached per process)."""
+    global _profile
+    if _profile is not None:
+        return _profile
+    since = time.time() - HISTORY_LOOKBACK * DAY
+    try:
+        with connect() as conn:
+            rows = conn.execute(
+                "SELECT cycle, session_id, observed_at, last_seen, state FROM observations WHERE cycle >= ?", (since,)
+            ).fetchall()
+            openings = [r[0] for r in conn.execute("SELECT opened_after FROM openings WHERE cycle >= ?", (since,))]
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read slot history: {e}")
+        rows, openings = [], []
+    _profile = {"sessions": fill_times(rows), "openings": openings}
+    return _profile
+
+
+def open_chance(cycles, after):
+    """Share of release days a session was still open `after` seconds past release."""
+    known = [filled for filled, last_open in cycles if filled is not None or last_open >= after]
+    if not known:
+        return None
+    return sum(1 for filled in known if filled is None or filled > after) / len(known)
+
+
+def priority(snapshot, at=None):
+    """Session ids of the snapshot ordered by their chance of still being open at `at`.
+
+    None until HISTORY_MIN_DAYS release days were seen; callers keep their own order then.
+    """
+    sessions = load()["sessions"]
+    if max((len(cycles) for cycles in sessions.values()), default=0) < HISTORY_MIN_DAYS:
+        return None
+    at = at or time.time()
+    after = at - release_cycle(at)
+
+    def score(session_id):
+        cycles = sessions.get(session_id, [])
+        chance = open_chance(cycles, after)
+        fills = [filled for filled, _ in cycles if filled is not None]
+        # Never-seen-full sessions rank as the slowest to fill
+        return (1.0 if chance is None else chance, statistics.median(fills) if fills else float("inf"))
+
+    ids = sorted((slot.session_id for slot in snapshot), reverse=True)
+    ranked = sorted(ids, key=score, reverse=True)  # Stable: ties keep 6, 5, 4, ...
+    logger.info(f"Session priority from history: {ranked}")
+    return ranked
+
+
+def window():
+    """Learned (seconds before release, seconds after release) to poll, or None without enough history."""
+    openings = load()["openings"]
+    if len(openings) < HISTORY_MIN_DAYS:
+        return None
+    early = WINDOW_MARGIN - min(openings)
+    late = max(release_mode.RELEASE_WINDOW, max(openings) + WINDOW_MARGIN)
+    logger.info(f"Slots opened {min(openings):+.2f}s..{max(openings):+.2f}s around release over {len(openings)} days.")
+    return early, late
+
+# =============================
+# Report
+# =============================
+def report():
+    profile = load()
+    lines = [f"{'session':>7} {'days':>5} {'median fill':>12} {'open @+1s':>10} {'open @+60s':>11}"]
+    for session_id, cycles in sorted(profile["sessions"].items()):
+        fills = [filled for filled, _ in cycles if filled is not None]
+        median = f"{statistics.median(fills):.1f}s" if fills else "never"
+        chances = [open_chance(cycles, after) for after in (1, 60)]
+        lines.append(f"{session_id:>7} {len(cycles):>5} {median:>12} "
+                     + " ".join(f"{'-' if c is None else f'{c:.0%}':>10}" for c in chances))
+    if profile["openings"]:
+        lines.append(f"openings: {len(profile['openings'])} days, "
+                     f"{min(profile['openings']):+.2f}s..{max(profile['openings']):+.2f}s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(report())
@@ -0,0 +1,271 @@
+import os
+import re
+import sys
+import glob
+import gzip
+import time
+import html as htmllib
+import statistics
+from typing import List, NamedTuple, Optional
+
+# Everything the bot knows about slot markup lives here, with no browser or HTTP
+# dependency: the Slot model, build() for values read out of a browser, and
+# parse() for a whole dashboard document.
+#   python slot_parser.py [files or dirs...]   -> validate + benchmark debug/ captures
+
+# Constants
+QUOTA_RE = re.compile(r"(\d+)\s*/\s*(\d+)")
+SLOT_CLASS = "session-slot"
+QUOTA_CLASS = "session-quota"
+CODE_CLASS = "booking-code"
+CODE_PREFIX = "Kode: "
+FULL_BUTTON_TEXT = "Penuh"
+CORPUS_GLOBS = ("*.html", "*.html.gz")
+BENCH_ROUNDS = int(os.getenv("PARSER_BENCH_ROUNDS", "20"))  # Passes over the corpus per timing
+
+TAG_RE = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>")
+ATTR_RE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+SKIP_RE = re.compile(r"<!--.*?-->|<(script|style)\b.*?</\1\s*>", re.S | re.I)
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class Slot(NamedTuple):
+    """One .session-slot as seen on a day tab."""
+    session_id: int
+    used: Optional[int]
+    total: Optional[int]
+    quota_text: str  # e.g. "Kuota: 21/30"
+    available: bool  # has the .available class
+    full: bool
+    reserved: bool  # has the .reserved-by-user class
+    booking_code: str  # without the "Kode: " prefix
+
+    @property
+    def state(self):
+        if self.reserved:
+            return "reserved"
+        if self.full:
+            return "full"
+        return "available" if self.available else "closed"
+
+
+def build(session_id, classes, quota_text, button_text="", booking_code=""):
+    """Turns raw slot markup values (from the browser or a parser) into a Slot."""
+    classes = set(classes.split()) if isinstance(classes, str) else set(classes)
+    match = QUOTA_RE.search(quota_text)
+    used, total = (int(match.group(1)), int(match.group(2))) if match else (None, None)
+    full = (
+        (total is not None and used >= total)
+        or "full" in classes
+        or FULL_BUTTON_TEXT in button_text
+    )
+    return Slot(
+        session_id=int(session_id),
+        used=used,
+        total=total,
+        quota_text=quota_text,
+        available="available" in classes,
+        full=full,
+        reserved="reserved-by-user" in classes,
+        booking_code=booking_code.replace(CODE_PREFIX, "").strip(),
+    )
+
+# =============================
+# Parsing
+# =============================
+def _attrs(text):
+    found = {}
+    for m in ATTR_RE.finditer(text):
+        name = m.group(1).lower()
+        if name not in found:
+            value = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4) or ""
+            found[name] = htmllib.unescape(value) if "&" in value else value
+    return found
+
+
+def _text(parts):
+    text = "".join(parts)
+    if "&" in text:
+        text = htmllib.unescape(text)
+    return " ".join(text.split())
+
+
+def parse_raw(document):
+    """Raw values of every .session-slot: dicts with session_id, classes, quota/button/code text, has_button."""
+    if SLOT_CLASS not in document:
+        return []
+    if "<!--" in document or "<script" in document or "<style" in document:
+        document = SKIP_RE.sub("", document)
+
+    found = []
+    pos = 0
+    while True:
+        # Jump straight to the next slot's start tag; nothing outside slots matters
+        hit = document.find(SLOT_CLASS, pos)
+        if hit < 0:
+            return found
+        start = document.rfind("<", 0, hit)
+        m = TAG_RE.match(document, start) if start >= 0 else None
+        if m is None or m.group(1) or m.end() <= hit:
+            pos = hit + len(SLOT_CLASS)  # The class name outside a start tag: text, or an end tag
+            continue
+        attrs = _attrs(m.group(3))
+        classes = attrs.get("class", "").split()
+        if SLOT_CLASS not in classes:
+            pos = m.end()  # e.g. "session-slot-list"
+            continue
+        slot = {"session_id": attrs.get("data-session-id", ""), "classes": classes,
+                "quota": [], "button": [], "code": [], "has_button": False}
+        found.append(slot)
+        pos = _walk(document, m.end(), m.group(2).lower(), slot)
+
+
+def _walk(document, pos, slot_tag, slot):
+    """Reads one slot's children up to its end tag; returns the position after it."""
+    stack = [(slot_tag, None)]  # (tag, role) of every open element inside the slot
+    roles = []  # Roles currently open, innermost last
+    for m in TAG_RE.finditer(document, pos):
+        if m.start() > pos and roles:
+            text = document[pos:m.start()]
+            for role in roles:
+                slot[role].append(text)
+        pos = m.end()
+        tag = m.group(2).lower()
+        if m.group(1):
+            # Tolerate unclosed children by unwinding to the matching open tag
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i][0] == tag:
+                    for _, role in stack[i:]:
+                        if role is not None:
+                            roles.remove(role)
+                    del stack[i:]
+                    break
+            if not stack:
+                return pos
+            continue
+        if tag in VOID_TAGS or m.group(3).rstrip().endswith("/"):
+            continue
+        role = None
+        if tag == "button" and not slot["has_button"]:
+            slot["has_button"] = True
+            role = "button"
+        elif "class" in m.group(3):
+            classes = _attrs(m.group(3)).get("class", "").split()
+            if SLOT_CLASS in classes:
+                return m.start()  # A new slot opened before this one closed
+            if QUOTA_CLASS in classes:
+                role = "quota"
+            elif CODE_CLASS in classes:
+                role = "code"
+        if role is not None:
+            roles.append(role)
+        stack.append((tag, role))
+    if roles:
+        text = document[pos:]
+        for role in roles:
+            slot[role].append(text)
+    return len(document)
+
+
+def parse(document) -> List[Slot]:
+    """Every slot in a dashboard HTML document, as the browser snapshot would report it."""
+    result = []
+    for raw in parse_raw(document):
+        if raw["session_id"].isdigit():
+            result.append(build(raw["session_id"], raw["classes"], _text(raw["quota"]),
+                                _text(raw["button"]), _text(raw["code"])))
+    return result
+
+# =============================
+# Markup Drift
+# =============================
+def problems(document):
+    """What no longer matches the expected markup, as readable strings; empty when the page parses cleanly."""
+    if "date-btn" not in document and SLOT_CLASS not in document:
+        return []  # Not a dashboard (e.g. the login page)
+    raw_slots = parse_raw(document)
+    if not raw_slots:
+        return ["no .session-slot elements on a dashboard page"]
+    issues = []
+    for raw in raw_slots:
+        sid = raw["session_id"] or "?"
+        if not raw["session_id"].isdigit():
+            issues.append(f"slot {sid}: data-session-id missing or not a number")
+            continue
+        quota = _text(raw["quota"])
+        if not raw["quota"]:
+            issues.append(f"slot {sid}: no .{QUOTA_CLASS}")
+        elif not QUOTA_RE.search(quota):
+            issues.append(f"slot {sid}: quota text {quota!r} has no used/total")
+        if "reserved-by-user" in raw["classes"]:
+            if not _text(raw["code"]):
+                issues.append(f"slot {sid}: reserved without a .{CODE_CLASS}")
+        elif "available" in raw["classes"] and not raw["has_button"]:
+            issues.append(f"slot {sid}: available without a button")
+    return issues
+
+# =============================
+# Corpus
+# =============================
+def read_capture(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def corpus(paths):
+    """(path, html) for every capture under the given files/directories."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in CORPUS_GLOBS:
+                files.extend(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+        else:
+            files.append(path)
+    return [(path, read_capture(path)) for path in sorted(set(files))]
+
+
+def _bench(fn, documents, rounds):
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for document in documents:
+            fn(document)
+        times.append(time.perf_counter() - t0)
+    return len(documents) / statistics.median(times)
+
+
+def validate(paths, rounds=BENCH_ROUNDS):
+    """Checks every capture for markup drift, then times the parser and the HTTP engine's full page parse."""
+    pages = corpus(paths)
+    if not pages:
+        print(f"No captures found in {', '.join(paths)}")
+        return 1
+    try:
+        import http_engine
+    except ImportError:
+        http_engine = None  # requests not installed: time the slot parser alone
+
+    failed = 0
+    slots_seen = 0
+    for path, document in pages:
+        issues = problems(document)
+        snapshot = parse(document)
+        slots_seen += len(snapshot)
+        if issues:
+            failed += 1
+            print(f"DRIFT {path}")
+            for issue in issues:
+                print(f"  - {issue}")
+
+    documents = [document for _, document in pages]
+    size = sum(len(document) for document in documents) / len(documents)
+    print(f"{len(pages)} captures ({size / 1024:.1f} KiB avg), {slots_seen} slots, {failed} with problems")
+    print(f"slot_parser.parse        {_bench(parse, documents, rounds):>10.0f} pages/s")
+    if http_engine is not None:
+        print(f"http_engine.parse_page   {_bench(http_engine.parse_page, documents, rounds):>10.0f} pages/s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(validate(sys.argv[1:] or ["debug"]))
@@ -0,0 +1,184 @@
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from slot_parser import Slot, build  # The markup model lives in slot_parser; re-exported for callers
+import waits
+
+# One round trip: every .session-slot on the current tab as plain data
+SNAPSHOT_JS = """
+return Array.prototype.map.call(document.querySelectorAll('.session-slot'), function (el) {
+    function text(node) { return node ? (node.innerText || node.textContent || '').trim() : ''; }
+    return {
+        id: el.getAttribute('data-session-id'),
+        cls: el.className,
+        quota: text(el.querySelector('.session-quota')),
+        button: text(el.querySelector('button')),
+        code: text(el.querySelector('.booking-code'))
+    };
+});
+"""
+
+# Every day tab the dashboard exposes, with the view URL it loads (if any)
+DAY_TABS_JS = """
+return Array.prototype.map.call(document.querySelectorAll('.date-btn[data-day]'), function (btn) {
+    return {
+        day: btn.getAttribute('data-day'),
+        url: btn.getAttribute('href') || btn.getAttribute('data-url') || '',
+        active: btn.classList.contains('active')
+    };
+});
+"""
+
+# True once a freshly opened window has its page, tabs included
+DAY_LOADED_JS = """
+return document.readyState === 'complete' && !!document.querySelector('.date-btn[data-day]');
+"""
+
+# True once a window shows the given day's slots. A page that marks its selected tab
+# .active must mark this day's; one that marks none gets the old "slots rendered" check
+DAY_READY_JS = """
+var day = arguments[0];
+if (document.querySelector('.date-btn.active') && !document.querySelector('.date-btn.active[data-day="' + day + '"]')) {
+    return false;
+}
+return document.querySelectorAll('.session-slot').length > 0;
+"""
+
+# Installed right before the click: records the first booking network response and
+# the moment the chosen slot turns reserved-by-user or shows a booking code
+WATCH_JS = """
+var sessionId = arguments[0];
+var state = window.__booking = {response: null, confirmedAt: null};
+function slotEl() { return document.querySelector('.session-slot[data-session-id="' + sessionId + '"]'); }
+function confirmed(el) { return el && (el.classList.contains('reserved-by-user') || el.querySelector('.booking-code')); }
+new MutationObserver(function () {
+    if (!state.confirmedAt && confirmed(slotEl())) { state.confirmedAt = performance.now(); }
+}).observe(document.body, {subtree: true, childList: true, attributes: true, attributeFilter: ['class']});
+var origFetch = window.fetch;
+if (origFetch) {
+    window.fetch = function () {
+        return origFetch.apply(this, arguments).then(function (resp) {
+            if (!state.response) { state.response = {status: resp.status, at: performance.now()}; }
+            return resp;
+        });
+    };
+}
+var origSend = XMLHttpRequest.prototype.send;
+XMLHttpRequest.prototype.send = function () {
+    this.addEventListener('loadend', function () {
+        if (!state.response) { state.response = {status: this.status, at: performance.now()}; }
+    });
+    return origSend.apply(this, arguments);
+};
+"""
+
+# Polled after the alert; also works after a full page load, where the hooks are gone
+CONFIRM_JS = """
+var sessionId = arguments[0];
+var state = window.__booking || {};
+var el = document.querySelector('.session-slot[data-session-id="' + sessionId + '"]');
+if (state.confirmedAt || (el && (el.classList.contains('reserved-by-user') || el.querySelector('.booking-code')))) {
+    return 'reserved';
+}
+if (document.querySelector('.success-message')) { return 'success-message'; }
+if (el && !state.confirmedAt && el.classList.contains('full')) { return 'full'; }  // Lost the race
+if (state.response && state.response.status >= 400) { return 'rejected:' + state.response.status; }
+return null;
+"""
+
+
+def pick(snapshot, preferences=None):
+    """Session ids worth clicking, best first: preference order, else highest session_id first."""
+    available = {slot.session_id for slot in snapshot if slot.available and not slot.full}
+    if preferences:
+        return [session_id for session_id in preferences if session_id in available]
+    return sorted(available, reverse=True)
+
+
+# =============================
+# Selenium
+# =============================
+def snapshot(driver) -> List[Slot]:
+    """All slots on the current tab in a single execute_script call."""
+    result = []
+    for raw in driver.execute_script(SNAPSHOT_JS) or []:
+        if not (raw.get("id") or "").isdigit():
+            continue
+        result.append(build(raw["id"], raw["cls"], raw["quota"], raw["button"], raw["code"]))
+    return result
+
+
+def _loaded(driver):
+    try:
+        return driver.execute_script(DAY_LOADED_JS)
+    except WebDriverException:
+        return False  # Still navigating
+
+
+def scan_days(driver, day_url, capture=None) -> Dict[str, Optional[List[Slot]]]:
+    """Snapshots every day tab at once: one browser tab per day, all loading in parallel.
+
+    Call on the dashboard. Returns {day: [Slot]} in tab order, with None for a day
+    whose slots never showed up. day_url is used for tabs without a link of their
+    own; capture(day) runs while each day's window is current.
+    """
+    tabs = driver.execute_script(DAY_TABS_JS) or []
+    main = driver.current_window_handle
+    base = driver.current_url
+    windows = {}
+    for tab in tabs:
+        if tab["active"] and main not in windows.values():
+            windows[tab["day"]] = main  # Already on screen
+            continue
+        url = urljoin(base, tab["url"]) if tab["url"] else day_url.format(day=tab["day"])
+        before = set(driver.window_handles)
+        driver.execute_script("window.open(arguments[0], '_blank');", url)  # Returns before the page loads
+        windows[tab["day"]] = (set(driver.window_handles) - before).pop()
+
+    result = {}
+    try:
+        for day, handle in windows.items():
+            driver.switch_to.window(handle)
+            try:
+                waits.until(driver, _loaded, "day_tab")
+                # Only a view that marks the day's tab active proves it honoured the URL;
+                # otherwise click the tab in this window right away
+                if not any(tab["day"] == day and tab["active"] for tab in driver.execute_script(DAY_TABS_JS) or []):
+                    driver.find_element(By.CSS_SELECTOR, f".date-btn[data-day='{day}']").click()
+                waits.until(driver, lambda d: d.execute_script(DAY_READY_JS, day), "tab_slots")
+            except WebDriverException:  # TimeoutException included
+                result[day] = None
+                continue
+            result[day] = snapshot(driver)
+            if capture is not None:
+                capture(day)
+    finally:
+        for handle in windows.values():
+            if handle != main:
+                driver.switch_to.window(handle)
+                driver.close()
+        driver.switch_to.window(main)
+    return result
+
+
+def find_button(driver, session_id):
+    return driver.find_element(By.CSS_SELECTOR, f".session-slot[data-session-id='{session_id}'] button")
+
+
+def watch_booking(driver, session_id):
+    """Call right before clicking the slot button."""
+    driver.execute_script(WATCH_JS, session_id)
+
+
+def wait_for_booking(driver, session_id, timeout, clicked_at):
+    """Waits for the booking outcome. Returns (outcome, seconds since click); outcome None on timeout."""
+    try:
+        outcome = WebDriverWait(driver, timeout, poll_frequency=0.05, ignored_exceptions=(WebDriverException,)).until(
+            lambda d: d.execute_script(CONFIRM_JS, session_id)
+        )
+    except TimeoutException:
+        outcome = None
+    return outcome, time.perf_counter() - clicked_at
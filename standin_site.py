@@ -0,0 +1,248 @@
+import os
+import time
+import random
+import secrets
+import argparse
+import logging
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Local stand-in for performancelab.my.id serving the markup the bot relies on:
+# the kode/nama form, .membership-status / #membership-warning, .date-btn[data-day],
+# .session-slot with quota, reserved-by-user and booking codes, and a confirm() alert.
+# Run it and point the bot at it with SITE_URL=http://127.0.0.1:8765/
+
+SESSIONS = range(1, 7)
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# Site State
+# =============================
+class SiteState:
+    def __init__(self, latency=0.0, jitter=0.0, quota=30, release_in=None, contention=0.0,
+                 extra_days=0, expired=False, seed=None):
+        self.latency = latency  # Seconds added to every response
+        self.jitter = jitter
+        self.quota = quota
+        self.contention = contention  # Seats per second taken by other members after release
+        self.extra_days = extra_days  # Bookable days beyond tomorrow, keyed by ISO date
+        self.expired = expired
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.logins = {}  # cookie -> member code
+        self.reset(release_in)
+
+    def reset(self, release_in=None):
+        """Fresh quotas and no reservations. release_in=None means tomorrow is already open."""
+        with self.lock:
+            self.release_at = None if release_in is None else time.time() + release_in
+            self.base_used = {(day, sid): self.random.randint(0, self.quota - 5) for day in self.days() for sid in SESSIONS}
+            self.booked = {}  # (day, session_id) -> seats taken through book.php
+            self.reservations = {}  # (code, day) -> (session_id, booking code)
+            self.booked_at = {}  # (code, day) -> epoch seconds of the booking
+
+    def days(self):
+        today = date.today()
+        return ["today", "tomorrow"] + [(today + timedelta(days=2 + i)).isoformat() for i in range(self.extra_days)]
+
+    def is_open(self, day):
+        return day == "today" or self.release_at is None or time.time() >= self.release_at
+
+    def used(self, day, session_id):
+        used = self.base_used[(day, session_id)] + self.booked.get((day, session_id), 0)
+        if day != "today" and self.release_at is not None and self.contention:
+            used += int(max(0.0, time.time() - self.release_at) * self.contention)
+        return min(self.quota, used)
+
+    def reserve(self, code, day, session_id):
+        """Books a seat. Returns the booking code, or None when closed, full or already booked."""
+        with self.lock:
+            if (code, day) in self.reservations or not self.is_open(day) or self.used(day, session_id) >= self.quota:
+                return None
+            self.booked[(day, session_id)] = self.booked.get((day, session_id), 0) + 1
+            booking_code = secrets.token_hex(3).upper()
+            self.reservations[(code, day)] = (session_id, booking_code)
+            self.booked_at[(code, day)] = time.time()
+            return booking_code
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.random.uniform(0, self.jitter))
+
+# =============================
+# Markup
+# =============================
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Performance Lab</title></head><body>
+<form method="post" action="login.php">
+  <input type="text" id="kode" name="kode" placeholder="Kode member">
+  <input type="text" id="nama" name="nama" placeholder="Nama">
+  <button type="submit">Masuk</button>
+</form>
+</body></html>"""
+
+TAB_SCRIPT = """<script>
+document.querySelectorAll('.date-btn').forEach(function (btn) {
+  btn.addEventListener('click', function () {
+    var list = document.getElementById('session-list');
+    list.innerHTML = '';
+    document.querySelectorAll('.date-btn').forEach(function (b) { b.classList.toggle('active', b === btn); });
+    fetch(btn.dataset.url + '&partial=1').then(function (r) { return r.text(); })
+      .then(function (html) { list.innerHTML = html; });
+  });
+});
+</script>"""
+
+
+def render_slots(state, code, day):
+    reservation = state.reservations.get((code, day))
+    parts = []
+    for sid in SESSIONS:
+        used = state.used(day, sid)
+        quota = f'<span class="session-quota">Kuota: {used}/{state.quota}</span>'
+        if reservation and reservation[0] == sid:
+            parts.append(f'<div class="session-slot reserved-by-user" data-session-id="{sid}"><h4>Sesi {sid}</h4>{quota}'
+                         f'<div class="booking-code">Kode: {reservation[1]}</div></div>')
+        elif not state.is_open(day):
+            parts.append(f'<div class="session-slot" data-session-id="{sid}"><h4>Sesi {sid}</h4>{quota}'
+                         f'<button type="button" disabled>Belum dibuka</button></div>')
+        elif used >= state.quota:
+            parts.append(f'<div class="session-slot full" data-session-id="{sid}"><h4>Sesi {sid}</h4>{quota}'
+                         f'<button type="button" disabled>Penuh</button></div>')
+        else:
+            parts.append(f'<div class="session-slot available" data-session-id="{sid}"><h4>Sesi {sid}</h4>{quota}'
+                         f'<form method="post" action="book.php"><input type="hidden" name="day" value="{day}">'
+                         f'<button type="submit" name="session" value="{sid}" '
+                         f'onclick="return confirm(\'Booking sesi {sid}?\')">Booking</button></form></div>')
+    return "\n".join(parts)
+
+
+def render_dashboard(state, code, day):
+    warning_style = "" if state.expired else ' style="display: none"'
+    buttons = "".join(
+        f'<button class="date-btn{" active" if d == day else ""}" data-day="{d}" data-url="dashboard.php?day={d}">{d}</button>'
+        for d in state.days()
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>Dashboard</title></head><body>
+<div class="membership-status">Member {code} - Aktif</div>
+<div id="membership-warning"{warning_style}>Masa aktif membership telah berakhir.</div>
+<div class="date-tabs">{buttons}</div>
+<div id="session-list">
+{render_slots(state, code, day)}
+</div>
+{TAB_SCRIPT}
+</body></html>"""
+
+# =============================
+# HTTP Handler
+# =============================
+class Handler(BaseHTTPRequestHandler):
+    server_version = "StandIn/1.0"
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real site
+
+    def log_message(self, fmt, *args):
+        logger.debug(fmt % args)
+
+    def _member(self):
+        cookie = self.headers.get("Cookie", "")
+        for part in cookie.split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "PHPSESSID":
+                return self.server.state.logins.get(value)
+        return None
+
+    def _send(self, status, body="", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _redirect(self, location, headers=None):
+        self._send(302, "", dict(headers or {}, Location=location))
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        state = self.server.state
+        state.delay()
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path in ("/", "/index.php"):
+            return self._send(200, LOGIN_PAGE)
+        if url.path == "/dashboard.php":
+            code = self._member()
+            if code is None:
+                return self._redirect("/")
+            day = query.get("day", "today")
+            if day not in state.days():
+                return self._send(404, "unknown day")
+            with state.lock:
+                if query.get("partial"):
+                    return self._send(200, render_slots(state, code, day))
+                return self._send(200, render_dashboard(state, code, day))
+        self._send(404, "not found")
+
+    def do_POST(self):
+        state = self.server.state
+        state.delay()
+        url = urlsplit(self.path)
+        form = self._form()
+        if url.path == "/login.php":
+            if not form.get("kode") or not form.get("nama"):
+                return self._redirect("/")
+            cookie = secrets.token_hex(16)
+            state.logins[cookie] = form["kode"]
+            return self._redirect("/dashboard.php", {"Set-Cookie": f"PHPSESSID={cookie}; Path=/; HttpOnly"})
+        if url.path == "/book.php":
+            code = self._member()
+            if code is None:
+                return self._redirect("/")
+            day = form.get("day", "tomorrow")
+            state.reserve(code, day, int(form.get("session", 0)))
+            return self._redirect(f"/dashboard.php?day={day}")
+        self._send(404, "not found")
+
+
+def start(state=None, port=0):
+    """Starts the stand-in on a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.state = state or SiteState()
+    threading.Thread(target=server.serve_forever, name="standin-site", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Performance Lab booking site")
+    parser.add_argument("--port", type=int, default=int(os.getenv("STANDIN_PORT", "8765")))
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, seconds")
+    parser.add_argument("--quota", type=int, default=30)
+    parser.add_argument("--release-in", type=float, default=None, help="seconds until tomorrow's slots open")
+    parser.add_argument("--contention", type=float, default=0.0, help="seats per second taken by others after release")
+    parser.add_argument("--extra-days", type=int, default=0, help="bookable days beyond tomorrow")
+    parser.add_argument("--expired", action="store_true", help="show the membership warning")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    state = SiteState(args.latency, args.jitter, args.quota, args.release_in, args.contention, args.extra_days, args.expired)
+    server, url = start(state, args.port)
+    logger.info(f"Stand-in site on {url} (SITE_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
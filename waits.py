@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import atexit
+import random
+import logging
+import threading
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+import session_cache
+
+# Constants
+WAIT_TIMEOUT = float(os.getenv("WAIT_TIMEOUT", "10"))  # Ceiling for any single wait (the old fixed TIMEOUT)
+WAIT_MIN_BUDGET = float(os.getenv("WAIT_MIN_BUDGET", "1.5"))  # Floor for a learned budget
+WAIT_BUDGET_FACTOR = 3.0  # Budget = p95 of recent latencies x this
+WAIT_SAMPLES = 50  # Latencies kept per step
+WAIT_MIN_SAMPLES = 5  # Below this a step keeps the fixed ceiling
+RETRY_WINDOW = float(os.getenv("RETRY_WINDOW", "20"))  # Seconds a step may spend retrying
+RETRY_BASE = 0.1  # First backoff, seconds; doubled per attempt
+RETRY_CAP = 2.0
+FAST_POLL = 0.01  # First poll interval of a wait; grows to SLOW_POLL
+SLOW_POLL = 0.25
+BUDGETS_FILE = os.path.join(session_cache.CACHE_DIR, "wait_budgets.json")
+
+# Errors that say "not yet" while polling, and "try again" around a whole step
+POLL_IGNORED = (NoSuchElementException, StaleElementReferenceException)
+RETRYABLE = (TimeoutException, WebDriverException)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_samples = None  # step -> recent latencies in seconds
+_dirty = False
+_attempt = threading.local()  # Retry attempt in progress on this thread; widens budgets
+run_deadline = None  # Epoch seconds no retry may run past; set by the entry point
+
+
+# =============================
+# Learned Budgets
+# =============================
+def _load():
+    global _samples
+    if _samples is None:
+        try:
+            with open(BUDGETS_FILE, encoding="utf-8") as f:
+                _samples = {step: [float(v) for v in values] for step, values in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            _samples = {}
+    return _samples
+
+
+def observe(step, seconds):
+    """Feeds one successful latency into the step's budget."""
+    global _dirty
+    with _lock:
+        samples = _load().setdefault(step, [])
+        samples.append(round(seconds, 4))
+        del samples[:-WAIT_SAMPLES]
+        _dirty = True
+
+
+def budget(step):
+    """Seconds a wait for `step` may take: WAIT_BUDGET_FACTOR x the recent p95, within [WAIT_MIN_BUDGET, WAIT_TIMEOUT].
+
+    Doubles with every retry of the enclosing step, so a site slowed down by
+    release-time load gets more time on the next attempt instead of the same miss.
+    """
+    with _lock:
+        samples = sorted(_load().get(step, []))
+    if len(samples) < WAIT_MIN_SAMPLES:
+        return WAIT_TIMEOUT
+    p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+    learned = max(WAIT_MIN_BUDGET, p95 * WAIT_BUDGET_FACTOR)
+    return min(WAIT_TIMEOUT, learned * 2 ** getattr(_attempt, "n", 0))
+
+
+@atexit.register
+def save():
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(BUDGETS_FILE) or ".", exist_ok=True)
+            tmp = BUDGETS_FILE + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(_samples, f)
+            os.replace(tmp, BUDGETS_FILE)
+            _dirty = False
+        except OSError as e:
+            logger.warning(f"Could not save wait budgets: {e}")
+
+# =============================
+# Waits / Retries
+# =============================
+def until(driver, condition, step, timeout=None):
+    """WebDriverWait.until() with millisecond polling that backs off, and a learned budget.
+
+    Raises TimeoutException like WebDriverWait, so existing except clauses still apply.
+    """
+    limit = timeout or budget(step)
+    started = time.perf_counter()
+    deadline = started + limit
+    delay = FAST_POLL
+    while True:
+        try:
+            value = condition(driver)
+            if value:
+                observe(step, time.perf_counter() - started)
+                return value
+        except POLL_IGNORED:
+            pass
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise TimeoutException(f"{step} not ready after {limit:.1f}s")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 1.5, SLOW_POLL)
+
+
+def retry(fn, step, window=RETRY_WINDOW, retryable=RETRYABLE):
+    """Calls fn() until it returns, retrying `retryable` errors with full-jitter backoff.
+
+    Stops at `window` seconds or run_deadline, whichever comes first, and re-raises
+    the last error. Only for idempotent steps: login, tab clicks, slot scans.
+    """
+    deadline = time.time() + window
+    if run_deadline is not None:
+        deadline = min(deadline, run_deadline)
+    outer = getattr(_attempt, "n", 0)
+    attempt = 0
+    try:
+        while True:
+            _attempt.n = outer + attempt
+            try:
+                return fn()
+            except retryable as e:
+                attempt += 1
+                pause = random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2 ** attempt))
+                if time.time() + pause >= deadline:
+                    logger.warning(f"{step} failed after {attempt} attempt(s): {e}")
+                    raise
+                logger.info(f"{step} attempt {attempt} failed ({type(e).__name__}), retrying in {pause:.2f}s")
+                time.sleep(pause)
+    finally:
+        _attempt.n = outer
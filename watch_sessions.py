@@ -0,0 +1,216 @@
+import os
+import time
+import logging
+import traceback
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+import http_engine
+import session_cache
+import slots
+import slot_history
+import release_mode
+import check_sessions
+import waits
+from check_sessions import notify, GYM_CODE, GYM_NAME
+
+# Constants
+WATCH_DAYS = ["today", "tomorrow"]
+WATCH_MIN_INTERVAL = float(os.getenv("WATCH_MIN_INTERVAL", "5"))  # Seconds between polls right after a change
+WATCH_MAX_INTERVAL = float(os.getenv("WATCH_MAX_INTERVAL", "120"))  # Ceiling while nothing changes
+WATCH_BACKOFF = 1.5  # Interval growth per unchanged poll
+WATCH_RELEASE_INTERVAL = float(os.getenv("WATCH_RELEASE_INTERVAL", "1"))  # Seconds between polls around release
+WATCH_RELEASE_LEAD = 60  # Seconds before the release window to start tightening
+WATCH_DURATION = float(os.getenv("WATCH_DURATION", "0"))  # Seconds to run; 0 runs until stopped
+WATCH_QUOTA_STEP = int(os.getenv("WATCH_QUOTA_STEP", "1"))  # Smallest quota move worth a message
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# Sources
+# =============================
+class HttpSource:
+    """Day tabs over one pooled HTTP session."""
+
+    def __init__(self):
+        self.session = http_engine.create_session()
+        self.login()
+
+    def login(self):
+        logger.info("Logging in over HTTP...")
+        return session_cache.login_http(self.session, GYM_CODE, GYM_NAME)
+
+    def fetch(self, day):
+        return http_engine.fetch_day(self.session, day)[1].snapshot
+
+    def close(self):
+        self.session.close()
+
+
+class BrowserSource:
+    """Day tabs in one logged-in Chrome, for when the HTTP engine does not fit the site."""
+
+    def __init__(self):
+        self.driver = check_sessions.create_driver()
+        if not self.login():
+            self.close()
+            raise RuntimeError("Login failed")
+
+    def login(self):
+        return check_sessions.login(self.driver)
+
+    def fetch(self, day):
+        if "dashboard.php" not in self.driver.current_url:
+            raise http_engine.HttpEngineError("Dropped back to the login page")
+        waits.until(self.driver, EC.element_to_be_clickable((By.CSS_SELECTOR, f".date-btn[data-day='{day}']")), "tab_button").click()
+        waits.until(self.driver, lambda d: d.execute_script(slots.DAY_READY_JS, day), "tab_slots")
+        return slots.snapshot(self.driver)
+
+    def close(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing driver: {e}")
+
+
+def open_source():
+    try:
+        return HttpSource()
+    except http_engine.HttpEngineError as e:
+        logger.warning(f"HTTP engine unavailable, falling back to Selenium: {e}")
+        return BrowserSource()
+
+# =============================
+# Change Detection
+# =============================
+def fingerprint(snapshot):
+    """What a person would notice on the tab: quota and state per session."""
+    return tuple(sorted((slot.session_id, slot.used, slot.state) for slot in snapshot))
+
+
+def describe(slot):
+    status = {"full": "Full", "closed": "Not open", "reserved": "Reserved"}.get(slot.state, "Available")
+    return f"{status} ({slot.quota_text})"
+
+
+def diff(day, old, new):
+    """Message lines for slots that opened, filled or moved quota; empty when nothing worth telling."""
+    before = {slot.session_id: slot for slot in old}
+    lines = []
+    for slot in sorted(new, key=lambda s: s.session_id):
+        prev = before.get(slot.session_id)
+        if prev is None:
+            continue
+        if prev.state != slot.state:
+            marker = "🟢 " if slot.state == "available" else ""
+            lines.append(f"{marker}Session {slot.session_id} : {describe(prev)} -> {describe(slot)}")
+        elif prev.used is not None and slot.used is not None and abs(slot.used - prev.used) >= WATCH_QUOTA_STEP:
+            lines.append(f"Session {slot.session_id} : {slot.quota_text}")
+    if not lines:
+        return ""
+    return f"**{day.capitalize()}**\n" + "\n".join(lines)
+
+# =============================
+# Adaptive Interval
+# =============================
+def near_release(now, window):
+    """True inside the release window (seconds before, after), plus a short lead-in."""
+    early, late = window
+    release = release_mode.release_epoch(0.0, now)
+    # The next release may be tomorrow's; the last one may have been yesterday's
+    return any(
+        r - early - WATCH_RELEASE_LEAD <= now <= r + late
+        for r in (release - slot_history.DAY, release, release + slot_history.DAY)
+    )
+
+
+def next_interval(interval, changed, now, window):
+    if near_release(now, window):
+        return WATCH_RELEASE_INTERVAL
+    if changed:
+        return WATCH_MIN_INTERVAL
+    return min(WATCH_MAX_INTERVAL, max(interval, WATCH_MIN_INTERVAL) * WATCH_BACKOFF)
+
+
+def sleep_for(interval, window):
+    """Sleeps `interval`, but wakes up as soon as the release lead-in starts."""
+    target = time.time() + interval
+    inside = near_release(time.time(), window)
+    while True:
+        remaining = target - time.time()
+        if remaining <= 0:
+            return
+        if not inside and near_release(time.time() + 1, window):
+            return
+        time.sleep(min(1.0, remaining))
+
+# =============================
+# MAIN
+# =============================
+def watch(source, stop_at=None):
+    seen = {}  # day -> (release cycle, fingerprint, snapshot)
+    window = slot_history.window() or (release_mode.RELEASE_EARLY, release_mode.RELEASE_WINDOW)
+    interval = WATCH_MIN_INTERVAL
+    errors = 0
+    while stop_at is None or time.time() < stop_at:
+        now = time.time()
+        changed = False
+        try:
+            for day in WATCH_DAYS:
+                snapshot = source.fetch(day)
+                slot_history.record(day, snapshot)
+                cycle = slot_history.release_cycle(now, day)
+                key = fingerprint(snapshot)
+                previous = seen.get(day)
+                if previous is None or previous[0] != cycle:
+                    # First look, or the tab now shows a different date: post the whole table
+                    notify(check_sessions.format_day(day, snapshot))
+                    changed = changed or previous is not None
+                elif previous[1] != key:
+                    message = diff(day, previous[2], snapshot)
+                    if message:
+                        notify(message)
+                    changed = True
+                seen[day] = (cycle, key, snapshot)
+            errors = 0
+        except http_engine.HttpEngineError as e:
+            # Usually an expired session: log in again on the same source
+            logger.warning(f"Day tab unreadable, logging in again: {e}")
+            errors += 1
+            session_cache.invalidate(GYM_CODE)
+            try:
+                source.login()
+            except Exception as e:
+                logger.error(f"Login failed: {e}")
+        except Exception as e:
+            logger.error(f"Watch poll failed: {e}")
+            errors += 1
+
+        if errors >= 5:
+            notify(">> Watch stopped after repeated errors")
+            return
+        interval = next_interval(interval, changed, now, window)
+        pause = min(WATCH_MAX_INTERVAL, interval * 2 ** errors)
+        logger.info(f"{'Change' if changed else 'No change'}; next poll in {pause:.1f}s.")
+        sleep_for(pause, window)
+
+
+def main():
+    notify("__**>> Watching Sessions <<**__")
+    stop_at = time.time() + WATCH_DURATION if WATCH_DURATION else None
+    source = None
+    try:
+        source = open_source()
+        watch(source, stop_at)
+    except KeyboardInterrupt:
+        logger.info("Watch stopped.")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        traceback.print_exc()
+        notify(f"🔥 Unexpected error: {e}")
+    finally:
+        if source is not None:
+            source.close()
+        notify(">> Watch ended")
+
+if __name__ == "__main__":
+    main()